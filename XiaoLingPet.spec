@@ -5,7 +5,7 @@ a = Analysis(
     ['F:\\桌宠\\app.py'],
     pathex=[],
     binaries=[],
-    datas=[('F:\\桌宠\\default_frames', 'default_frames')],
+    datas=[('F:\\桌宠\\build\\default_frames.xlpk', '.')],
     hiddenimports=['cv2', 'numpy'],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,142 @@
+import math
+import time
+import bisect
+from collections import deque
+from typing import List, Optional, Sequence
+
+
+class AnimationClock:
+    # 按单调时钟推算"此刻应显示哪一帧"，调度延迟不再累积；负载高时直接跳帧
+    def __init__(self, fps: float, history: int = 240):
+        self.fps = max(1.0, float(fps))
+        self._t0 = time.monotonic()
+        self._last_index: Optional[int] = None
+        self._due: Optional[float] = None
+        self._next_pos: Optional[float] = None
+        self._holds_src: Optional[Sequence[float]] = None
+        self._holds_len = 0
+        self._cum: List[float] = []
+        self._ticks: deque = deque(maxlen=history)
+        self._jitter: deque = deque(maxlen=history)
+        self.dropped = 0
+        self.shown = 0
+        # 限速时两次 tick 的最小间隔（秒），期间跳过的帧不计入丢帧
+        self.min_interval = 0.0
+        self._paused_pos: Optional[float] = None
+
+    def position(self, now: Optional[float] = None) -> float:
+        if self._paused_pos is not None:
+            return self._paused_pos
+        now = time.monotonic() if now is None else now
+        return max(0.0, (now - self._t0) * self.fps)
+
+    def reset(self, index: int = 0, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self._t0 = now - index / self.fps
+        self._last_index = None
+        self._due = None
+        if self._paused_pos is not None:
+            self._paused_pos = float(index)
+
+    @property
+    def paused(self) -> bool:
+        return self._paused_pos is not None
+
+    def pause(self, now: Optional[float] = None):
+        # 冻结播放位置，恢复后从同一帧继续，而不是跳到墙钟对应的位置
+        if self._paused_pos is None:
+            self._paused_pos = self.position(now)
+        self._due = None
+
+    def resume(self, now: Optional[float] = None):
+        if self._paused_pos is None:
+            return
+        now = time.monotonic() if now is None else now
+        self._t0 = now - self._paused_pos / self.fps
+        self._paused_pos = None
+        self._last_index = None
+        self._due = None
+
+    def set_fps(self, fps: float, now: Optional[float] = None):
+        # 保持当前播放位置不变，只改变之后的速度
+        now = time.monotonic() if now is None else now
+        pos = self.position(now)
+        self.fps = max(1.0, float(fps))
+        self._t0 = now - pos / self.fps
+        self._due = None
+
+    def _cumulative(self, holds: Sequence[float]) -> List[float]:
+        # 帧序列加载期间 holds 会增长，只在长度或对象变化时重算前缀和
+        if holds is not self._holds_src or len(holds) != self._holds_len or not self._cum:
+            cum = []
+            total = 0.0
+            for h in holds:
+                total += max(1e-3, float(h))
+                cum.append(total)
+            self._holds_src = holds
+            self._holds_len = len(holds)
+            self._cum = cum
+        return self._cum
+
+    def invalidate(self):
+        self._cum = []
+
+    def frame_at(self, count: int, now: Optional[float] = None, holds: Optional[Sequence[float]] = None) -> int:
+        # holds：每帧停留的帧数（重复帧合并后可大于 1），为空时每帧 1
+        if count <= 0:
+            return 0
+        pos = self.position(now)
+        if not holds:
+            self._next_pos = math.floor(pos) + 1
+            return int(pos) % count
+        cum = self._cumulative(holds)
+        total = cum[-1]
+        cycle = math.floor(pos / total)
+        within = pos - cycle * total
+        index = min(len(cum) - 1, bisect.bisect_right(cum, within))
+        self._next_pos = cycle * total + cum[index]
+        return index % count
+
+    def record(self, index: int, count: int, now: Optional[float] = None, weight: float = 1.0):
+        # weight：该帧代表的原始帧数，合并重复帧后实际帧率按它折算
+        now = time.monotonic() if now is None else now
+        if self._due is not None:
+            self._jitter.append((now - self._due) * 1000.0)
+        if self._last_index is not None and count > 0:
+            step = (index - self._last_index) % count
+            if step > 1 and self.min_interval * self.fps <= 1.0:
+                self.dropped += step - 1
+        self._last_index = index
+        self._ticks.append((now, weight))
+        self.shown += 1
+
+    def next_delay_ms(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        next_pos = self._next_pos
+        if next_pos is None:
+            next_pos = math.floor(self.position(now)) + 1
+        due = max(self._t0 + next_pos / self.fps, now + self.min_interval)
+        self._due = due
+        return max(1, int(math.ceil((due - now) * 1000.0)))
+
+    def stats(self) -> dict:
+        ticks = list(self._ticks)
+        achieved = 0.0
+        if len(ticks) >= 2 and ticks[-1][0] > ticks[0][0]:
+            achieved = sum(w for _, w in ticks[:-1]) / (ticks[-1][0] - ticks[0][0])
+        jit = sorted(abs(j) for j in self._jitter)
+
+        def pct(p: float) -> float:
+            if not jit:
+                return 0.0
+            return jit[min(len(jit) - 1, int(round(p / 100.0 * (len(jit) - 1))))]
+
+        return {
+            "target_fps": self.fps,
+            "achieved_fps": achieved,
+            "jitter_p50_ms": pct(50),
+            "jitter_p95_ms": pct(95),
+            "jitter_p99_ms": pct(99),
+            "dropped": self.dropped,
+            "shown": self.shown,
+        }
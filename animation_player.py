@@ -1,15 +1,87 @@
 import os
-import glob
-from typing import List, Optional
+import json
+import math
+import time
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 try:
-    from PIL import Image, ImageTk  # type: ignore
+    from PIL import Image, ImageSequence, ImageTk  # type: ignore
 except Exception:
     Image = None
+    ImageSequence = None
     ImageTk = None
 
+from animation_clock import AnimationClock
+from bg_keying import analyze, compose, key_frame, np
+from frame_cache import FrameCache
+from frame_delta import DeltaSequence
+from frame_layers import LayeredSequence
+from frame_pack import PACK_EXT, FramePack
+from frame_tween import crossfade
+from frame_stream import FrameStream
+from frame_watch import diff_index, ordered_paths, scan_images
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _load_pool() -> ThreadPoolExecutor:
+    # 解码/缩放/抠图都在 Pillow/numpy 内部释放 GIL，线程池即可铺满多核
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.getenv("FRAME_LOAD_WORKERS", "0") or 0) or (os.cpu_count() or 2)
+            _pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="frame-load")
+        return _pool
+
+
+def _near_duplicate(a, b, tolerance: float) -> bool:
+    # tolerance：任一像素任一通道允许的最大差值，只吸收压缩/缩放噪声；
+    # 哪怕只有几个像素的可见变化（如眨眼）也保留为独立帧。
+    # 比较对象是上一保留帧，显示内容与原帧的偏差始终不超过 tolerance
+    if a.shape != b.shape:
+        return False
+    return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max()) <= tolerance
+
+
+def _fast_resize(path: str, size: int):
+    # 草稿缩放：JPEG 直接按 DCT 缩放解码，其余格式先整数倍 reduce，再用 BILINEAR 补足余量
+    im = Image.open(path)
+    w, h = im.size
+    if size <= 0 or size >= w:
+        return im.convert("RGBA")
+    target = (size, max(1, int(h * size / w)))
+    im.draft("RGB", target)
+    img = im.convert("RGBA")
+    factor = img.size[0] // size
+    if factor >= 2:
+        img = img.reduce(factor)
+    if img.size != target:
+        img = img.resize(target, Image.BILINEAR)
+    return img
+
+
+def _psnr(a, b) -> Optional[float]:
+    if np is None or a.size != b.size:
+        return None
+    x = np.asarray(a.convert("RGBA"), dtype=np.float32)
+    y = np.asarray(b.convert("RGBA"), dtype=np.float32)
+    mse = float(((x - y) ** 2).mean())
+    if mse <= 0:
+        return float("inf")
+    return 10.0 * math.log10(255.0 * 255.0 / mse)
+
+
+# clips.json 中以对象描述的分层片段，片段键带此前缀以区别于目录/文件路径
+_LAYERED = "layered:"
+
+
 class AnimationPlayer:
-    def __init__(self, root, image_label, frames_dir: Optional[str] = None, fps: int = 12):
+    def __init__(self, root, image_label, frames_dir: Optional[str] = None, fps: int = 12, autoload: bool = True):
         self.root = root
         self.label = image_label
         self.fps = max(1, int(fps))
@@ -23,12 +95,78 @@ class AnimationPlayer:
         self.bg_fill_color = os.getenv("BG_FILL_COLOR", "#f4f4f4")
         self.alpha_threshold = int(os.getenv("ALPHA_THRESHOLD", "24"))
         self.recursive = os.getenv("ANIMATION_RECURSIVE", "false").lower() == "true"
+        self.streaming = os.getenv("ANIMATION_STREAMING", "false").lower() == "true"
+        self.stream_memory_mb = float(os.getenv("STREAM_MEMORY_MB", "32"))
+        self.master_size = int(os.getenv("MASTER_SIZE", "256"))
+        self.dedup_tolerance = float(os.getenv("FRAME_DEDUP_TOLERANCE", "2"))
+        self.delta_playback = os.getenv("ANIMATION_DELTA", "false").lower() == "true"
+        self.clip_cache_size = max(1, int(os.getenv("CLIP_CACHE_SIZE", "3")))
+        self.watch_seconds = float(os.getenv("ANIMATION_WATCH_SECONDS", "2"))
+        self.fast_draft = os.getenv("ANIMATION_FAST_DRAFT", "true").lower() == "true"
+        self.ambient_fps = float(os.getenv("AMBIENT_FPS", "2"))
+        self.throttle_fps = float(os.getenv("THROTTLE_FPS", "4"))
+        self._suspended = False
+        self._ambient = False
+        self._throttled = False
+        self._throttle_lock = threading.Lock()
+        self.layer_cache_mb = float(os.getenv("LAYER_CACHE_MB", "16"))
+        self.tween_frames = max(0, int(os.getenv("ANIMATION_TWEEN", "0")))
+        self._layered_build: Optional[dict] = None
+        self._drafts: List[str] = []
+        self._draft_images: Dict[str, object] = {}
+        self._load_report: dict = {}
+        self._load_started = 0.0
+        self._watch_dir: Optional[str] = None
+        self._watch_after: Optional[str] = None
+        self._index: Dict[str, tuple] = {}
+        self._sources: Dict[str, tuple] = {}
+        self._sources_params: dict = {}
+        self._hot_order: Optional[List[str]] = None
+        self._masters: Dict[str, tuple] = {}
+        self._clip = ""
+        self._clips: "OrderedDict[str, tuple]" = OrderedDict()
+        self._loading_paths: List[str] = []
+        self._stream: Optional[FrameStream] = None
+        self._stream_photo = None
         self._frames: List = []
         self._frame_index = 0
+        self._clock = AnimationClock(self.fps)
         self._after_id: Optional[str] = None
-        self._load_frames()
+        self._playing = False
+        self._cache = FrameCache()
+        self._load_gen = 0
+        self._loaded: "queue.Queue" = queue.Queue()
+        self._load_total = 0
+        self._load_done = 0
+        self._pending: Dict[int, object] = {}
+        self._incoming: List = []
+        self._layers: List = []
+        self._incoming_layers: List = []
+        self._holds: List[float] = []
+        self._incoming_holds: List[float] = []
+        self._holds_fps: Optional[float] = None
+        self._incoming_timed = False
+        self._incoming_last = None
+        self._next_index = 0
+        self._drain_after: Optional[str] = None
+        self._futures: List = []
+        self._animation: Optional[str] = None
+        self._configured = False
+        self._pack_limit: tuple = ("", None)
+        # autoload=False 时先不加载，等 configure() 一次性给齐设置后只加载一遍
+        if autoload:
+            self._load_frames()
 
     def _load_frames(self):
+        self._configured = True
+        self._cancel_load()
+        self._watch_dir = None
+        self._index = {}
+        self._sources = {}
+        self._drafts = []
+        self._draft_images = {}
+        self._load_started = time.monotonic()
+        self._load_report = {}
         if not Image or not ImageTk:
             try:
                 print("animation: pillow not available")
@@ -36,98 +174,835 @@ class AnimationPlayer:
                 pass
             self._frames = []
             return
-        if not self.frames_dir or not os.path.isdir(self.frames_dir):
+        if not self.frames_dir or not os.path.exists(self.frames_dir):
             try:
                 print("animation: dir invalid", self.frames_dir)
             except Exception:
                 pass
             self._frames = []
             return
-        if self.recursive:
-            paths = []
-            for r, _, files in os.walk(self.frames_dir):
-                for f in files:
-                    paths.append(os.path.join(r, f))
-        else:
-            paths = sorted(
-                glob.glob(os.path.join(self.frames_dir, "*.png"))
-                + glob.glob(os.path.join(self.frames_dir, "*.jpg"))
-                + glob.glob(os.path.join(self.frames_dir, "*.jpeg"))
-                + glob.glob(os.path.join(self.frames_dir, "*.webp"))
-                + glob.glob(os.path.join(self.frames_dir, "*.gif"))
+        clip_dir = self._clip or self.frames_dir
+        gen = self._load_gen
+        params = self._cache_params()
+        if clip_dir.startswith(_LAYERED):
+            self._load_layered(clip_dir[len(_LAYERED):], gen, params)
+            return
+        if clip_dir.lower().endswith(PACK_EXT) and os.path.isfile(clip_dir):
+            self._loading_paths = [clip_dir]
+            self._load_total = float("inf")
+            self._futures = [_load_pool().submit(self._load_pack, gen, clip_dir, params)]
+            self._drain_after = self.root.after(15, self._drain_loaded)
+            return
+        if os.path.isfile(clip_dir):
+            # 单个动图文件：由一个任务顺序 seek 解码，逐帧交给主线程
+            self._loading_paths = [clip_dir]
+            self._load_total = float("inf")
+            self._futures = [_load_pool().submit(self._load_animated, gen, clip_dir, params)]
+            self._drain_after = self.root.after(15, self._drain_loaded)
+            return
+        index = scan_images(clip_dir, self.recursive)
+        paths = ordered_paths(index, clip_dir)
+        self._loading_paths = paths
+        try:
+            print("animation: loading from", clip_dir, "files", len(paths))
+        except Exception:
+            pass
+        if not paths:
+            self._frames = []
+            self._ensure_visible_placeholder()
+            return
+        self._index = index
+        self._sources_params = params
+        self._watch_dir = clip_dir
+        if self.streaming:
+            self._watch_dir = None
+            self._frames = []
+            self._stream = FrameStream(
+                paths,
+                lambda p: self._load_cached(p, params)[0],
+                int(self.stream_memory_mb * 1024 * 1024),
             )
+            return
+        self._load_total = len(paths)
+        pool = _load_pool()
+        draft = self.fast_draft
+        self._futures = [pool.submit(self._load_one, gen, i, p, params, draft) for i, p in enumerate(paths)]
+        self._drain_after = self.root.after(15, self._drain_loaded)
+
+    def _cancel_load(self):
+        # 代号递增后，旧任务在工作线程里直接跳过，已完成的结果在主线程丢弃
+        self._load_gen += 1
+        for f in self._futures:
+            f.cancel()
+        self._futures = []
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        self._stream_photo = None
+        if self._drain_after:
+            try:
+                self.root.after_cancel(self._drain_after)
+            except Exception:
+                pass
+        self._drain_after = None
+        if self._watch_after:
+            try:
+                self.root.after_cancel(self._watch_after)
+            except Exception:
+                pass
+        self._watch_after = None
+        self._hot_order = None
+        self._layered_build = None
+        self._loaded = queue.Queue()
+        self._load_total = 0
+        self._load_done = 0
+        self._reset_incoming()
+
+    def _reset_incoming(self):
+        self._pending = {}
+        self._incoming = self._new_sequence()
+        self._incoming_layers = []
+        self._incoming_holds = []
+        self._incoming_timed = False
+        self._incoming_last = None
+        self._incoming_src = None
+        self._incoming_first = None
+        self._next_index = 0
+
+    def _delta_enabled(self) -> bool:
+        return self.delta_playback and np is not None and not self.streaming
+
+    def _new_sequence(self):
+        if self._delta_enabled():
+            return DeltaSequence(ImageTk.PhotoImage, self._blit)
+        return []
+
+    def _blit(self, dst, src, x: int, y: int):
+        # Tk 原生的 photo copy：只把补丁区域写入屏幕上的 PhotoImage，alpha 一并覆盖
+        self.label.tk.call(str(dst), "copy", str(src), "-to", x, y, "-compositingrule", "set")
+
+    def _load_one(self, gen: int, index: int, path: str, params: dict, draft: bool = False):
+        if gen != self._load_gen:
+            return
         try:
-            print("animation: loading from", self.frames_dir, "files", len(paths))
+            if self._throttled:
+                # 系统繁忙时同一时刻只处理一帧，把 CPU 让给前台任务
+                with self._throttle_lock:
+                    if gen != self._load_gen:
+                        return
+                    img, layer, drafted = self._load_cached(path, params, draft)
+            else:
+                img, layer, drafted = self._load_cached(path, params, draft)
+        except Exception:
+            img, layer, drafted = None, None, False
+        self._loaded.put((gen, index, img, layer, None, drafted))
+
+    def _load_animated(self, gen: int, path: str, params: dict):
+        # GIF/WebP/APNG：按文件自带的每帧时长播放；每帧单独进磁盘缓存
+        count = 0
+        try:
+            with Image.open(path) as im:
+                for frame in ImageSequence.Iterator(im):
+                    if gen != self._load_gen:
+                        return
+                    # WebP 等格式在 load() 时才填入当前帧的 duration，先读会拿到上一帧的时长
+                    frame.load()
+                    duration = frame.info.get("duration") or im.info.get("duration")
+                    ref = (path, {"frame": count})
+                    key = self._cache.key(path, dict(params, frame=count))
+                    img = self._cache.get(key)
+                    layer = (ref, None, None, None, None)
+                    if img is None:
+                        img, layer = self._process_image(frame.convert("RGBA"), params, ref)
+                        self._cache.put(key, img)
+                    self._loaded.put((gen, count, img, layer, duration, False))
+                    count += 1
         except Exception:
             pass
-        imgs = []
-        for p in paths:
+        self._loaded.put((gen, -1, count, None, None, False))
+
+    def _load_pack(self, gen: int, path: str, params: dict):
+        # 预编译帧包：直接解压现成的缩放结果与掩码，只剩合成一步；
+        # 尺寸不在包里时取最接近的尺寸缩放后重新分析
+        count = 0
+        try:
+            pack = FramePack(path) if np is not None else None
+        except Exception:
+            pack = None
+        if pack is not None:
             try:
-                img = Image.open(p).convert("RGBA")
-                w, h = img.size
-                if self.pet_size > 0:
-                    img = img.resize((self.pet_size, int(h * self.pet_size / w)), Image.LANCZOS)
-                img = self._process_bg(img)
-                imgs.append(ImageTk.PhotoImage(img))
+                size = params["pet_size"]
+                src = pack.best_size(size) if size > 0 else pack.sizes[-1]
+                for i in range(len(pack)):
+                    if gen != self._load_gen:
+                        return
+                    arr, mask, key_rgb, prekeyed = pack.layer(src, i)
+                    h, w = arr.shape[:2]
+                    if size > 0 and size != w:
+                        arr = np.asarray(Image.fromarray(arr, "RGBA").resize((size, int(h * size / w)), Image.LANCZOS))
+                        mask, key_rgb, prekeyed = analyze(arr, params["bg_threshold"])
+                    elif params["bg_threshold"] != pack.bg_threshold:
+                        mask, key_rgb, prekeyed = analyze(arr, params["bg_threshold"])
+                    layer = (("", {}), arr, mask, key_rgb, prekeyed)
+                    self._loaded.put((gen, count, self._compose(layer, params), layer, None, False))
+                    count += 1
             except Exception:
+                pass
+            finally:
+                pack.close()
+        self._loaded.put((gen, -1, count, None, None, False))
+
+    def _load_layered(self, name: str, gen: int, params: dict):
+        # 分层片段：身体序列与叠加层分别处理并各自进磁盘缓存，全部就绪后在主线程组装；
+        # 多个片段共用同一身体序列时只处理一次
+        spec = self._clip_manifest().get(name) or {}
+        base_dir = os.path.join(self.frames_dir, str(spec.get("base") or ""))
+        base_paths = ordered_paths(scan_images(base_dir, self.recursive), base_dir) if os.path.isdir(base_dir) else []
+        if not base_paths:
+            try:
+                print("animation: layered clip without base frames", name)
+            except Exception:
+                pass
+            self._frames = []
+            self._ensure_visible_placeholder()
+            return
+        try:
+            with Image.open(base_paths[0]) as im:
+                src_w = im.size[0]
+        except Exception:
+            src_w = 0
+        size = params["pet_size"]
+        scale = size / src_w if size > 0 and src_w else 1.0
+        layers = []
+        overlay_paths: List[str] = []
+        for layer in spec.get("layers") or []:
+            if not isinstance(layer, dict):
                 continue
-        self._frames = imgs
+            src = os.path.join(self.frames_dir, str(layer.get("src") or ""))
+            if os.path.isdir(src):
+                lp = ordered_paths(scan_images(src), src)
+            elif os.path.isfile(src):
+                lp = [src]
+            else:
+                continue
+            if not lp:
+                continue
+            x = int(round(float(layer.get("x", 0)) * scale))
+            y = int(round(float(layer.get("y", 0)) * scale))
+            layers.append((len(lp), x, y))
+            overlay_paths.extend(lp)
+        base_key = (base_dir, json.dumps(params, sort_keys=True))
+        base = self._shared_base(base_key)
+        todo = [] if base else base_paths
+        self._layered_build = {"key": base_key, "base": base, "count": len(todo), "layers": layers, "got": {}}
+        self._loading_paths = todo + overlay_paths
+        self._load_total = len(self._loading_paths)
+        pool = _load_pool()
+        self._futures = [pool.submit(self._load_one, gen, i, p, params) for i, p in enumerate(todo)]
+        self._futures += [
+            pool.submit(self._load_overlay, gen, len(todo) + i, p, params, scale)
+            for i, p in enumerate(overlay_paths)
+        ]
+        self._drain_after = self.root.after(15, self._drain_loaded)
+
+    def _shared_base(self, key) -> Optional[List]:
+        for frames in [self._frames] + [entry["frames"] for entry in self._clips.values()]:
+            if isinstance(frames, LayeredSequence) and frames.key == key:
+                return frames.base
+        return None
+
+    def _load_overlay(self, gen: int, index: int, path: str, params: dict, scale: float):
+        if gen != self._load_gen:
+            return
+        try:
+            key = self._cache.key(path, dict(params, overlay_scale=round(scale, 6)))
+            img = self._cache.get(key)
+            if img is None:
+                img = Image.open(path).convert("RGBA")
+                w, h = img.size
+                if scale != 1.0:
+                    img = img.resize((max(1, int(round(w * scale))), max(1, int(round(h * scale)))), Image.LANCZOS)
+                # 叠加层始终按透明抠图，否则填充色会盖住身体
+                img = key_frame(img, params["bg_threshold"], params["alpha_threshold"], True, params["bg_fill_color"])
+                self._cache.put(key, img)
+        except Exception:
+            img = None
+        self._loaded.put((gen, index, img, None, None, False))
+
+    def _apply_layered(self):
+        build = self._layered_build
+        self._layered_build = None
+        got = build["got"]
+        count = build["count"]
+        base = build["base"] or [got[i] for i in range(count) if got.get(i) is not None]
+        overlays = []
+        i = count
+        for n, x, y in build["layers"]:
+            imgs = [got[j] for j in range(i, i + n) if got.get(j) is not None]
+            i += n
+            if imgs:
+                overlays.append((imgs, x, y))
+        self._cache.prune()
+        if not base:
+            self._frames = []
+            self._ensure_visible_placeholder()
+            return
+        self._frames = LayeredSequence(
+            base, overlays, ImageTk.PhotoImage, int(self.layer_cache_mb * 1024 * 1024), build["key"]
+        )
+        self._layers = []
+        self._holds = []
+        self._holds_fps = None
+        self._frame_index = 0
+        self._clock.reset()
+        self._clock.invalidate()
+        self._load_report["loaded_s"] = time.monotonic() - self._load_started
+        self._store_clip()
+        try:
+            print("animation: layered clip", len(base), "frames", len(overlays), "overlays", "%.2fs" % self._load_report["loaded_s"])
+        except Exception:
+            pass
+        if self._playing and self._after_id is None:
+            self._tick()
+
+    def _clip_manifest(self) -> dict:
+        p = os.path.join(self.frames_dir, "clips.json")
+        if not os.path.isfile(p):
+            return {}
+        try:
+            with open(p, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _resolve_clip(self, name: str) -> str:
+        # 动画名 → 片段目录：优先 clips.json 中的映射，其次同名子目录；都没有则用根目录的默认序列
+        if not name or not self.frames_dir or not os.path.isdir(self.frames_dir):
+            return ""
+        entry = self._clip_manifest().get(name)
+        if isinstance(entry, dict):
+            return _LAYERED + name
+        if isinstance(entry, str) and entry:
+            d = os.path.join(self.frames_dir, entry)
+        elif os.path.isdir(os.path.join(self.frames_dir, name)):
+            d = os.path.join(self.frames_dir, name)
+        else:
+            return ""
+        return d if os.path.exists(d) else ""
+
+    def _use_clip(self, clip: str) -> bool:
+        entry = self._clips.get(clip)
+        if entry is None or self.streaming:
+            return False
+        self._cancel_load()
+        self._frames = entry["frames"]
+        self._layers = entry["layers"]
+        self._holds = entry["holds"]
+        self._holds_fps = entry["holds_fps"]
+        self._loading_paths = entry["paths"]
+        self._index = entry["index"]
+        self._sources = entry["sources"]
+        self._sources_params = entry["sources_params"]
+        self._watch_dir = entry["watch_dir"]
+        self._drafts = entry["drafts"]
+        self._rescale_holds()
+        self._clips.move_to_end(clip)
+        if not self._upgrade_drafts():
+            self._schedule_watch()
+        return True
+
+    def _store_clip(self):
+        if self.streaming or not self._frames:
+            return
+        self._clips[self._clip] = {
+            "frames": self._frames,
+            "layers": self._layers,
+            "holds": self._holds,
+            "holds_fps": self._holds_fps,
+            "paths": self._loading_paths,
+            "index": self._index,
+            "sources": self._sources,
+            "sources_params": self._sources_params,
+            "watch_dir": self._watch_dir,
+            "drafts": self._drafts,
+        }
+        self._clips.move_to_end(self._clip)
+        while len(self._clips) > self.clip_cache_size:
+            _, old = self._clips.popitem(last=False)
+            # 片段被淘汰时一并释放它的母版，共享的解码缓存随片段一起按 LRU 收缩
+            live = set()
+            for entry in self._clips.values():
+                live.update(entry["paths"])
+            for p in old["paths"]:
+                if p not in live:
+                    self._masters.pop(p, None)
+
+    def _load_cached(self, path: str, params: dict, draft: bool = False):
+        # 返回 (成品帧, 抠图层, 是否草稿)；磁盘缓存命中时抠图层只是记下来源的占位，
+        # 切换透明/填充色时由 _resolve_layer 按需重建
+        key = self._cache.key(path, params)
+        img = self._cache.get(key)
+        if img is not None:
+            return img, ((path, {}), None, None, None, None), False
+        if draft and not self._has_master(path, params):
+            # 冷启动（内存与磁盘都没有母版）：先用快速缩放出草稿帧上屏，不写缓存，
+            # 稍后由 _upgrade_drafts 换成 LANCZOS 成品；有母版时直接从母版派生，比草稿更快
+            img, layer = self._process_bg(_fast_resize(path, params["pet_size"]), params, (path, {}))
+            return img, layer, True
+        img, layer = self._process_file(path, params)
+        self._cache.put(key, img)
+        return img, layer, False
+
+    def _has_master(self, path: str, params: dict) -> bool:
+        master_size = params["master_size"]
+        if not 0 < params["pet_size"] <= master_size:
+            return False
+        key = self._cache.key(path, {"master_size": master_size})
+        entry = self._masters.get(path)
+        if entry is not None and entry[0] == key:
+            return True
+        return self._cache.contains(key)
+
+    def _upgrade_drafts(self) -> bool:
+        # 草稿帧全部上屏后，在后台按正常流程重新处理这些帧，完成后整体替换，时钟不重置
+        if not self._drafts or not self._watch_dir or self._stream is not None or self._throttled:
+            return False
+        order = list(self._loading_paths)
+        need = list(self._drafts)
+        for p in need:
+            entry = self._sources.get(p)
+            if entry is not None:
+                self._draft_images[p] = entry[0]
+        self._cancel_load()
+        self._hot_order = order
+        self._loading_paths = need
+        self._load_total = len(need)
+        params = self._cache_params()
+        gen = self._load_gen
+        pool = _load_pool()
+        self._futures = [pool.submit(self._load_one, gen, i, p, params) for i, p in enumerate(need)]
+        self._drain_after = self.root.after(15, self._drain_loaded)
+        return True
+
+    def _report_upgrade(self):
+        scores = []
+        for p, draft in self._draft_images.items():
+            entry = self._sources.get(p)
+            if entry is not None and entry[0] is not None:
+                score = _psnr(draft, entry[0])
+                if score is not None and score != float("inf"):
+                    scores.append(score)
+        self._draft_images = {}
+        self._load_report["full_quality_s"] = time.monotonic() - self._load_started
+        self._load_report["draft_psnr_db"] = (sum(scores) / len(scores)) if scores else None
+        try:
+            print(
+                "animation: full quality after %.2fs, draft PSNR %s dB"
+                % (self._load_report["full_quality_s"], "%.1f" % self._load_report["draft_psnr_db"] if scores else "-")
+            )
+        except Exception:
+            pass
+
+    def load_stats(self) -> dict:
+        # first_frame_s：首帧上屏；loaded_s：全部帧（可能是草稿）就绪；
+        # full_quality_s：草稿全部换成 LANCZOS 成品；draft_psnr_db：草稿相对成品的平均 PSNR
+        return dict(self._load_report, drafts=len(self._drafts))
+
+    def _drain_loaded(self):
+        # 主线程：把已完成的帧按顺序转成 PhotoImage，并入正在播放的序列
+        self._drain_after = None
+        gen = self._load_gen
+        got = False
+        while True:
+            try:
+                g, index, img, layer, duration, drafted = self._loaded.get_nowait()
+            except queue.Empty:
+                break
+            if g != gen:
+                continue
+            if index < 0:
+                # 动图解码结束，img 位置携带实际帧数
+                self._load_total = img
+                continue
+            self._load_done += 1
+            if self._layered_build is not None:
+                self._layered_build["got"][index] = img
+                continue
+            if self._watch_dir:
+                path = self._loading_paths[index]
+                self._sources[path] = (img, layer)
+                if drafted:
+                    self._drafts.append(path)
+            if self._hot_order is not None:
+                continue
+            self._pending[index] = (img, layer, duration)
+            got = True
+        if got:
+            while self._next_index in self._pending:
+                img, layer, duration = self._pending.pop(self._next_index)
+                self._next_index += 1
+                if img is not None:
+                    self._append_frame(img, layer, duration)
+            if self._incoming and self._frames is not self._incoming:
+                self._frames = self._incoming
+                self._layers = self._incoming_layers
+                self._holds = self._incoming_holds
+                self._frame_index = 0
+                self._clock.reset()
+                self._load_report["first_frame_s"] = time.monotonic() - self._load_started
+            self._holds_fps = self.fps if self._incoming_timed else None
+            self._clock.invalidate()
+            if self._playing and self._after_id is None and self._frames:
+                self._tick()
+        if self._load_done < self._load_total:
+            self._drain_after = self.root.after(15, self._drain_loaded)
+            return
+        if self._layered_build is not None:
+            self._apply_layered()
+            return
+        self._cache.prune()
+        if self._hot_order is not None:
+            self._apply_hot()
+            return
+        self._finish_sequence()
+        if self._frames is not self._incoming:
+            self._frames = self._incoming
+            self._layers = self._incoming_layers
+            self._holds = self._incoming_holds
+            self._holds_fps = self.fps if self._incoming_timed else None
+        self._load_report["loaded_s"] = time.monotonic() - self._load_started
         if not self._frames:
             self._ensure_visible_placeholder()
+        else:
+            self._store_clip()
+            try:
+                print(
+                    "animation: loaded", len(self._frames), "unique of", self._load_done, "frames",
+                    "first frame %.2fs, all %.2fs" % (self._load_report.get("first_frame_s", 0.0), self._load_report["loaded_s"]),
+                )
+            except Exception:
+                pass
+        if not self._upgrade_drafts():
+            self._schedule_watch()
+
+    def _schedule_watch(self):
+        if self.watch_seconds <= 0 or not self._watch_dir or self._watch_after or self._suspended:
+            return
+        self._watch_after = self.root.after(int(self.watch_seconds * 1000), self._poll_watch)
+
+    def _poll_watch(self):
+        # 轮询目录 mtime/大小：只重新处理新增或改动的帧，删除的帧直接移出序列
+        self._watch_after = None
+        d = self._watch_dir
+        if not d or self._load_done < self._load_total or self._throttled:
+            self._schedule_watch()
+            return
+        index = scan_images(d, self.recursive)
+        changed, removed = diff_index(self._index, index)
+        if not changed and not removed:
+            self._schedule_watch()
+            return
+        try:
+            print("animation: reload", d, "changed", len(changed), "removed", len(removed))
+        except Exception:
+            pass
+        self._index = index
+        order = ordered_paths(index, d)
+        params = self._cache_params()
+        stale = params != self._sources_params
+        changed_set = set(changed)
+        need = [
+            p for p in order
+            if p in changed_set
+            or p not in self._sources
+            or p in self._drafts
+            or (stale and (self._sources[p][1] is None or self._sources[p][1][1] is None))
+        ]
+        for p in removed:
+            self._sources.pop(p, None)
+            self._masters.pop(p, None)
+        self._cancel_load()
+        self._sources_params = params
+        self._hot_order = order
+        if not need:
+            self._apply_hot()
+            return
+        self._loading_paths = need
+        self._load_total = len(need)
+        pool = _load_pool()
+        gen = self._load_gen
+        self._futures = [pool.submit(self._load_one, gen, i, p, params) for i, p in enumerate(need)]
+        self._drain_after = self.root.after(15, self._drain_loaded)
+
+    def _apply_hot(self):
+        # 用保留的逐文件结果按新顺序重建序列后整体替换，时钟不重置，播放不中断
+        order = self._hot_order or []
+        self._hot_order = None
+        upgraded = bool(self._drafts)
+        self._drafts = []
+        params = self._cache_params()
+        self._reset_incoming()
+        for p in order:
+            entry = self._sources.get(p)
+            if not entry or entry[0] is None:
+                continue
+            img, layer = entry
+            if layer is not None and layer[1] is not None:
+                img = self._compose(layer, params)
+            self._append_frame(img, layer)
+        self._finish_sequence()
+        self._frames = self._incoming
+        self._layers = self._incoming_layers
+        self._holds = self._incoming_holds
+        self._holds_fps = None
+        self._loading_paths = order
+        self._load_total = self._load_done = 0
+        self._clock.invalidate()
+        if self._frames:
+            self._store_clip()
+            if self._playing and self._after_id is None:
+                self._tick()
+        else:
+            self._ensure_visible_placeholder()
+        if upgraded:
+            self._report_upgrade()
+        self._schedule_watch()
 
-    def _process_bg(self, img: Image.Image) -> Image.Image:
-        px = img.load()
-        w, h = img.size
-        # 自动检测：角点若已透明，视为素材已抠图；对 alpha 做二值化避免外缘描线
-        corner_alpha = [px[1, 1][3], px[w - 2, 1][3], px[1, h - 2][3], px[w - 2, h - 2][3]]
-        if self.use_transparent and sum(corner_alpha) / 4 < 10:
-            for y in range(h):
-                for x in range(w):
-                    r0, g0, b0, a0 = px[x, y]
-                    px[x, y] = (r0, g0, b0, 0 if a0 <= self.alpha_threshold else 255)
-            return img
-
-        corners = [px[1, 1], px[w - 2, 1], px[1, h - 2], px[w - 2, h - 2]]
-        r = int(sum([c[0] for c in corners]) / 4)
-        g = int(sum([c[1] for c in corners]) / 4)
-        b = int(sum([c[2] for c in corners]) / 4)
-        thr = self.bg_threshold
-
-        def parse_hex(s: str):
-            s = s.strip().lstrip('#')
-            if len(s) == 6:
-                return int(s[0:2], 16), int(s[2:4], 16), int(s[4:6], 16)
-            return 244, 244, 244
-
-        fr, fg, fb = parse_hex(self.bg_fill_color)
-        for y in range(h):
-            for x in range(w):
-                cr, cg, cb, ca = px[x, y]
-                dr = abs(cr - r)
-                dg = abs(cg - g)
-                db = abs(cb - b)
-                d = (dr + dg + db) // 3
-                if d <= thr:
-                    if self.use_transparent:
-                        px[x, y] = (r, g, b, 0)
-                    else:
-                        px[x, y] = (fr, fg, fb, 255)
-                else:
-                    if self.use_transparent:
-                        px[x, y] = (cr, cg, cb, 0 if ca <= self.alpha_threshold else 255)
-                    else:
-                        px[x, y] = (cr, cg, cb, 255)
+    def _append_frame(self, img, layer, duration=None):
+        # 与上一帧几乎相同则只延长上一帧的停留时长，不再创建新的 PhotoImage；
+        # 停留时长以 1/fps 为单位，动图帧按文件里的毫秒时长换算
+        hold = 1.0
+        if duration:
+            hold = max(1.0, float(duration)) * self.fps / 1000.0
+            self._incoming_timed = True
+        seq = self._incoming
+        delta = isinstance(seq, DeltaSequence)
+        tween = self.tween_frames > 0 and np is not None
+        arr = None
+        if np is not None and (self.dedup_tolerance >= 0 or delta or tween):
+            arr = np.asarray(img)
+        if tween:
+            self._tween_to(arr, layer)
+            self._incoming_src = (arr, layer, hold)
+            if self._incoming_first is None:
+                self._incoming_first = (arr, layer)
+        if (
+            arr is not None
+            and self.dedup_tolerance >= 0
+            and self._incoming_last is not None
+            and _near_duplicate(self._incoming_last, arr, self.dedup_tolerance)
+        ):
+            self._incoming_holds[-1] += hold
+            return
+        self._push_frame(img, arr, layer, hold)
+
+    def _push_frame(self, img, arr, layer, hold: float):
+        try:
+            if isinstance(self._incoming, DeltaSequence):
+                self._incoming.append(img, arr)
+            else:
+                self._incoming.append(ImageTk.PhotoImage(img))
+        except Exception:
+            return
+        self._incoming_layers.append(layer)
+        self._incoming_holds.append(hold)
+        self._incoming_last = arr
+
+    def _tween_to(self, arr, layer):
+        # 在上一源帧与本帧之间插入 tween_frames 个混合帧，平分上一源帧的停留时长：
+        # 动画速度不变，可见帧率提高 (tween_frames + 1) 倍
+        prev = self._incoming_src
+        if prev is None or not self._incoming_holds:
+            return
+        prev_arr, prev_layer, prev_hold = prev
+        if prev_arr.shape != arr.shape or _near_duplicate(prev_arr, arr, max(0.0, self.dedup_tolerance)):
+            return
+        n = self.tween_frames
+        share = prev_hold / (n + 1)
+        self._incoming_holds[-1] -= prev_hold - share
+        for k in range(1, n + 1):
+            t = k / (n + 1)
+            out = crossfade(prev_arr, arr, t)
+            tween_layer = None
+            if prev_layer is not None and layer is not None:
+                tween_layer = ("tween", prev_layer, layer, t)
+            self._push_frame(Image.fromarray(out, "RGBA"), out, tween_layer, share)
+
+    def _finish_sequence(self):
+        # 序列加载完成：补上末帧 → 首帧的过渡帧与差分补丁，循环时同样平滑
+        if self._incoming_first is not None and len(self._incoming_holds) > 1:
+            self._tween_to(*self._incoming_first)
+        self._incoming_src = None
+        if isinstance(self._incoming, DeltaSequence):
+            self._incoming.close_loop()
+
+    def _cache_params(self) -> dict:
+        return {
+            "pet_size": self.pet_size,
+            "bg_threshold": self.bg_threshold,
+            "alpha_threshold": self.alpha_threshold,
+            "use_transparent": self.use_transparent,
+            "bg_fill_color": self.bg_fill_color,
+            "master_size": self.master_size,
+        }
+
+    def _master(self, path: str, master_size: int) -> Image.Image:
+        # 母版：源图缩到 master_size 宽的未抠图 RGBA，常驻内存并写入磁盘缓存，
+        # 之后任何不超过母版的尺寸都直接从它派生，不再解码源文件
+        key = self._cache.key(path, {"master_size": master_size})
+        entry = self._masters.get(path)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        img = self._cache.get(key)
+        if img is None:
+            img = Image.open(path).convert("RGBA")
+            w, h = img.size
+            if w > master_size:
+                img = img.resize((master_size, int(h * master_size / w)), Image.LANCZOS)
+            self._cache.put(key, img)
+        if not self.streaming:
+            self._masters[path] = (key, img)
         return img
 
+    def _process_file(self, path: str, params: dict):
+        return self._process_bg(self._sized_file(path, params), params, (path, {}))
+
+    def _sized_file(self, path: str, params: dict) -> Image.Image:
+        size = params["pet_size"]
+        master_size = params["master_size"]
+        if 0 < size <= master_size:
+            img = self._master(path, master_size)
+        else:
+            img = Image.open(path).convert("RGBA")
+        w, h = img.size
+        if size > 0 and size != w:
+            return img.resize((size, int(h * size / w)), Image.LANCZOS)
+        return img.copy()
+
+    def _process_image(self, img: Image.Image, params: dict, ref: tuple):
+        w, h = img.size
+        size = params["pet_size"]
+        if size > 0 and size != w:
+            img = img.resize((size, int(h * size / w)), Image.LANCZOS)
+        return self._process_bg(img, params, ref)
+
+    def _analyze_layer(self, img: Image.Image, params: dict, ref: tuple):
+        arr = np.asarray(img)
+        mask, key_rgb, prekeyed = analyze(arr, params["bg_threshold"])
+        return (ref, arr, mask, key_rgb, prekeyed)
+
+    def _resolve_layer(self, layer, params: dict):
+        # 占位层（磁盘缓存命中的帧）：从母版重新缩放并分析出掩码，母版同样来自内存或磁盘缓存，
+        # 与首次加载走同一流程，结果一致；不需要重新合成
+        if layer[0] == "tween":
+            _, a, b, t = layer
+            return ("tween", self._resolve_layer(a, params), self._resolve_layer(b, params), t)
+        if layer[1] is not None:
+            return layer
+        ref = layer[0]
+        path, extra = ref
+        if "frame" in extra:
+            with Image.open(path) as im:
+                im.seek(extra["frame"])
+                img = im.convert("RGBA")
+            w, h = img.size
+            size = params["pet_size"]
+            if size > 0 and size != w:
+                img = img.resize((size, int(h * size / w)), Image.LANCZOS)
+            return self._analyze_layer(img, params, ref)
+        return self._analyze_layer(self._sized_file(path, params), params, ref)
+
+    def _process_bg(self, img: Image.Image, params: dict, ref: tuple = ("", {})):
+        if np is None or self.streaming:
+            out = key_frame(
+                img,
+                params["bg_threshold"],
+                params["alpha_threshold"],
+                params["use_transparent"],
+                params["bg_fill_color"],
+            )
+            return out, None
+        layer = self._analyze_layer(img, params, ref)
+        return self._compose(layer, params), layer
+
+    def _compose(self, layer, params: dict) -> Image.Image:
+        _, arr, mask, key_rgb, prekeyed = layer
+        out = compose(
+            arr,
+            mask,
+            key_rgb,
+            prekeyed,
+            params["use_transparent"],
+            params["alpha_threshold"],
+            params["bg_fill_color"],
+        )
+        return Image.fromarray(out, "RGBA")
+
+    def _recomposite(self) -> bool:
+        # 透明开关/填充色/alpha 阈值只影响合成：用缓存的掩码原地重绘现有 PhotoImage
+        if self._stream is not None or self._load_done < self._load_total:
+            return False
+        if not isinstance(self._frames, list):
+            return False
+        if not self._frames or len(self._layers) != len(self._frames):
+            return False
+        if any(layer is None for layer in self._layers):
+            return False
+        params = self._cache_params()
+        done = []
+        fresh = {}
+        try:
+            layers = list(_load_pool().map(lambda layer: self._resolve_layer(layer, params), self._layers))
+        except Exception:
+            return False
+        # 重建出的掩码留在序列里，之后再切换不必重复分析
+        self._layers[:] = layers
+        try:
+            for photo, layer in zip(self._frames, self._layers):
+                if layer[0] == "tween":
+                    _, a, b, t = layer
+                    out = crossfade(np.asarray(self._compose(a, params)), np.asarray(self._compose(b, params)), t)
+                    photo.paste(Image.fromarray(out, "RGBA"))
+                    continue
+                img = self._compose(layer, params)
+                photo.paste(img)
+                done.append((layer[0], img))
+                fresh[layer[0][0]] = (img, layer)
+        except Exception:
+            return False
+        # 逐文件结果同步成新参数下的成品，热重载复用它们时不会退回旧的透明设置
+        for path, entry in fresh.items():
+            if path in self._sources:
+                self._sources[path] = entry
+        if all(p in fresh for p in self._sources):
+            # 有未重绘的文件（如被合并的重复帧）时保留旧参数，热重载会把其中只有占位层的重新加载
+            self._sources_params = params
+        for clip in [c for c in self._clips if c != self._clip]:
+            del self._clips[clip]
+        _load_pool().submit(self._store_composited, done, params)
+        return True
+
+    def _store_composited(self, done, params: dict):
+        for (path, extra), img in done:
+            if not path:
+                continue
+            self._cache.put(self._cache.key(path, dict(params, **extra)), img)
+
     def play(self, animation_name: str):
-        # 当前仅一套帧序列，全部动画名共用
+        # 没有对应片段的动画名共用根目录的默认序列；片段在首次用到时才加载
         if self._after_id:
             try:
                 self.root.after_cancel(self._after_id)
             except Exception:
                 pass
-        self._frame_index = 0
-        self._tick()
+        self._animation = animation_name
+        clip = self._resolve_clip(animation_name)
+        if clip != self._clip or not self._configured:
+            self._clip = clip
+            if not self._use_clip(clip):
+                self._load_frames()
+        self._restart()
 
     def stop(self):
         if self._after_id:
@@ -136,29 +1011,98 @@ class AnimationPlayer:
             except Exception:
                 pass
         self._after_id = None
+        self._playing = False
 
-    def set_pet_size(self, size: int):
+    def configure(
+        self,
+        frames_dir: Optional[str] = None,
+        fps: Optional[int] = None,
+        pet_size: Optional[int] = None,
+        use_transparent: Optional[bool] = None,
+        bg_fill_color: Optional[str] = None,
+        alpha_threshold: Optional[int] = None,
+        animation: Optional[str] = None,
+    ) -> bool:
+        # 一次性应用多项设置，最多触发一次加载：只改 fps 不重载，只改抠图合成参数时原地重绘，
+        # 没有变化则什么也不做。返回是否重新加载了帧
+        reload = not self._configured
+        if frames_dir and frames_dir != self.frames_dir:
+            self.frames_dir = frames_dir
+            self._masters = {}
+            self._clip = ""
+            reload = True
+        if pet_size is not None:
+            try:
+                size = max(32, int(pet_size))
+            except Exception:
+                size = 128
+            limit = self.max_pet_size()
+            if limit:
+                size = min(size, limit)
+            if size != self.pet_size:
+                self.pet_size = size
+                reload = True
+        limit = self.max_pet_size()
+        if limit and self.pet_size > limit:
+            self.pet_size = limit
+            reload = True
+        keying = False
+        if use_transparent is not None and bool(use_transparent) != self.use_transparent:
+            self.use_transparent = bool(use_transparent)
+            keying = True
+        if bg_fill_color and str(bg_fill_color) != self.bg_fill_color:
+            self.bg_fill_color = str(bg_fill_color)
+            keying = True
+        if alpha_threshold is not None and int(alpha_threshold) != self.alpha_threshold:
+            self.alpha_threshold = int(alpha_threshold)
+            keying = True
+        if fps is not None and max(1, int(fps)) != self.fps:
+            self.fps = max(1, int(fps))
+            self._clock.set_fps(self.fps)
+            self._rescale_holds()
+        if animation is not None:
+            # 先按目标动画选好片段，避免加载完默认目录后 play() 又切片段再加载一遍
+            self._animation = animation
+        if reload and self._animation is not None:
+            self._clip = self._resolve_clip(self._animation)
+        if not reload and keying and not self._recomposite():
+            reload = True
+        if not reload:
+            return False
         try:
             self.stop()
         except Exception:
             pass
-        try:
-            self.pet_size = max(32, int(size))
-        except Exception:
-            self.pet_size = 128
-        self._load_frames()
-        self._frame_index = 0
-        self._tick()
+        self._reload()
+        return True
+
+    def max_pet_size(self) -> Optional[int]:
+        # 帧包只含打包时的几个尺寸，超过最大尺寸只能放大、画面发糊，因此限制在最大尺寸；
+        # 目录与动图文件从源图缩放，没有上限
+        path = self.frames_dir or ""
+        if not path.lower().endswith(PACK_EXT) or not os.path.isfile(path):
+            return None
+        if self._pack_limit[0] != path:
+            limit = None
+            try:
+                pack = FramePack(path)
+                try:
+                    limit = pack.sizes[-1]
+                finally:
+                    pack.close()
+            except Exception:
+                pass
+            self._pack_limit = (path, limit)
+        return self._pack_limit[1]
+
+    def set_pet_size(self, size: int):
+        self.configure(pet_size=size)
 
     def set_use_transparent(self, use: bool):
-        try:
-            self.stop()
-        except Exception:
-            pass
-        self.use_transparent = bool(use)
-        self._load_frames()
-        self._frame_index = 0
-        self._tick()
+        self.set_keying(use_transparent=use)
+
+    def set_keying(self, use_transparent: Optional[bool] = None, bg_fill_color: Optional[str] = None, alpha_threshold: Optional[int] = None):
+        self.configure(use_transparent=use_transparent, bg_fill_color=bg_fill_color, alpha_threshold=alpha_threshold)
 
     def set_fps(self, fps: int):
         try:
@@ -166,28 +1110,184 @@ class AnimationPlayer:
         except Exception:
             pass
         self.fps = max(1, int(fps))
+        self._clock.set_fps(self.fps)
+        self._rescale_holds()
         self._tick()
 
+    def _rescale_holds(self):
+        # 按毫秒计时的动图帧：fps 变化后停留帧数随之缩放，实际时长不变
+        if self._holds_fps and self._holds_fps != self.fps:
+            ratio = self.fps / self._holds_fps
+            self._holds[:] = [h * ratio for h in self._holds]
+            self._holds_fps = self.fps
+            self._clock.invalidate()
+
     def set_frames_dir(self, frames_dir: Optional[str]):
         if frames_dir:
+            if frames_dir != self.frames_dir:
+                self._masters = {}
+                self._clip = ""
             self.frames_dir = frames_dir
         try:
             self.stop()
         except Exception:
             pass
+        self._reload()
+
+    def _reload(self):
+        # 尺寸/抠图/目录等变化后所有已缓存片段都失效，只重新加载当前片段
+        self._clips.clear()
         self._load_frames()
+        self._restart()
+
+    def _restart(self):
         self._frame_index = 0
+        self._clock.reset()
         self._tick()
 
     def _tick(self):
+        # 帧仍在后台加载时先记下播放意图，首批帧到达后由 _drain_loaded 接续
+        self._playing = True
+        if self._suspended:
+            self._after_id = None
+            return
+        if self._stream is not None:
+            self._tick_stream()
+            return
         if not self._frames:
+            self._after_id = None
+            return
+        n = len(self._frames)
+        now = time.monotonic()
+        holds = self._holds if len(self._holds) == n else None
+        self._frame_index = self._clock.frame_at(n, now, holds)
+        if isinstance(self._frames, (DeltaSequence, LayeredSequence)):
+            frame = self._frames.show(self._frame_index)
+        else:
+            frame = self._frames[self._frame_index]
+        if getattr(self.label, "image", None) is not frame:
+            self.label.configure(image=frame)
+            self.label.image = frame
+        self._clock.record(self._frame_index, n, now, holds[self._frame_index] if holds else 1)
+        self._after_id = self.root.after(self._clock.next_delay_ms(), self._tick)
+
+    def _tick_stream(self):
+        stream = self._stream
+        n = len(stream)
+        if not n:
+            self._after_id = None
             return
-        frame = self._frames[self._frame_index]
-        self.label.configure(image=frame)
-        self.label.image = frame
-        self._frame_index = (self._frame_index + 1) % len(self._frames)
-        interval = int(1000 / self.fps)
-        self._after_id = self.root.after(interval, self._tick)
+        now = time.monotonic()
+        index = self._clock.frame_at(n, now)
+        img = stream.get(index)
+        if img is not None and img is not False:
+            # 复用同一个 PhotoImage，常驻内存只剩预取窗口
+            photo = self._stream_photo
+            if photo is None or (photo.width(), photo.height()) != img.size:
+                photo = ImageTk.PhotoImage(img)
+                self._stream_photo = photo
+            else:
+                photo.paste(img)
+            self.label.configure(image=photo)
+            self.label.image = photo
+            self._frame_index = index
+            self._clock.record(index, n, now)
+        # 未命中时保持上一帧，等待预取线程追上
+        self._after_id = self.root.after(self._clock.next_delay_ms(), self._tick)
+
+    def set_visible(self, visible: bool):
+        # 窗口隐藏/最小化/被完全遮挡时停掉播放与目录轮询定时器并冻结时钟，显示后从原来的帧继续
+        suspended = not visible
+        if suspended == self._suspended:
+            return
+        self._suspended = suspended
+        if suspended:
+            self._clock.pause()
+            for attr in ("_after_id", "_watch_after"):
+                after_id = getattr(self, attr)
+                if after_id:
+                    try:
+                        self.root.after_cancel(after_id)
+                    except Exception:
+                        pass
+                setattr(self, attr, None)
+            return
+        self._clock.resume()
+        self._schedule_watch()
+        if self._playing and self._after_id is None:
+            self._tick()
+
+    def set_ambient(self, ambient: bool):
+        # 用户长时间无输入时降到环境帧率：时间轴照常推进，只是更少地唤醒和换帧
+        ambient = bool(ambient) and self.ambient_fps > 0
+        if ambient == self._ambient:
+            return
+        self._ambient = ambient
+        self._update_rate_cap()
+
+    def set_throttled(self, throttled: bool):
+        # 系统繁忙时限速：降低帧率、后台帧处理串行化、推迟草稿升级与目录轮询；恢复后补做推迟的工作
+        throttled = bool(throttled)
+        if throttled == self._throttled:
+            return
+        self._throttled = throttled
+        self._update_rate_cap()
+        if not throttled and self._load_done >= self._load_total and not self._upgrade_drafts():
+            self._schedule_watch()
+
+    def _update_rate_cap(self):
+        caps = []
+        if self._ambient:
+            caps.append(self.ambient_fps)
+        if self._throttled and self.throttle_fps > 0:
+            caps.append(self.throttle_fps)
+        interval = 1.0 / min(caps) if caps else 0.0
+        shorter = interval < self._clock.min_interval
+        self._clock.min_interval = interval
+        if shorter and self._after_id and not self._suspended:
+            # 放宽限速时不必等完上一个长间隔
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+            self._tick()
+
+    def timing_stats(self) -> dict:
+        return self._clock.stats()
+
+    def delta_stats(self) -> Optional[dict]:
+        if not isinstance(self._frames, DeltaSequence):
+            return None
+        return self._frames.stats()
+
+    def layer_stats(self) -> Optional[dict]:
+        if not isinstance(self._frames, LayeredSequence):
+            return None
+        return self._frames.stats()
+
+    def set_delta_playback(self, enabled: bool):
+        try:
+            self.stop()
+        except Exception:
+            pass
+        self.delta_playback = bool(enabled)
+        self._reload()
+
+    def set_streaming(self, enabled: bool, memory_mb: Optional[float] = None):
+        try:
+            self.stop()
+        except Exception:
+            pass
+        self.streaming = bool(enabled)
+        if memory_mb is not None:
+            self.stream_memory_mb = max(1.0, float(memory_mb))
+        self._reload()
+
+    def stream_stats(self) -> Optional[dict]:
+        if self._stream is None:
+            return None
+        return self._stream.stats()
 
     def _ensure_visible_placeholder(self):
         try:
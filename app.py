@@ -10,7 +10,8 @@ import tkinter as tk
 from tkinter import filedialog
 from ai_pet_brain import AIPetBrain
 from ai_pet_brain import AIPetBrain
-from system_monitor import get_system_status, get_user_activity
+from system_monitor import get_system_status, get_user_activity, get_idle_seconds, is_window_covered, get_cpu_load
+from load_throttle import LoadThrottle
 from animation_player import AnimationPlayer
 from tray_icon import Tray
 from settings_window import SettingsWindow
@@ -74,29 +75,38 @@ class PetApp:
 
         cfg = load_config()
         fps = int(str(cfg.get("fps") or os.getenv("ANIMATION_FPS", "12")))
-        self.player = AnimationPlayer(self.root, self.image_label, fps=fps)
+        self.player = AnimationPlayer(self.root, self.image_label, fps=fps, autoload=False)
         size = int(str(cfg.get("pet_size") or os.getenv("PET_SIZE", "128")))
-        self.player.set_pet_size(size)
         frames_dir = cfg.get("frames_dir")
         if not frames_dir:
             try:
                 import sys
                 base = getattr(sys, "_MEIPASS", os.path.abspath(os.path.dirname(__file__)))
+                # 打包版内置的是预编译帧包；源码运行时仍用 default_frames 目录
+                default_pack = os.path.join(base, "default_frames.xlpk")
                 default_frames = os.path.join(base, "default_frames")
-                if os.path.isdir(default_frames):
+                if os.path.isfile(default_pack):
+                    frames_dir = default_pack
+                elif os.path.isdir(default_frames):
                     frames_dir = default_frames
             except Exception:
                 pass
-        if frames_dir:
-            try:
-                self.player.set_frames_dir(frames_dir)
-            except Exception:
-                pass
+        # 所有设置一次给齐，启动时只加载一遍帧
         try:
-            self.player.set_use_transparent(bool(self.use_transparent))
+            self.player.configure(
+                frames_dir=frames_dir,
+                pet_size=size,
+                use_transparent=bool(self.use_transparent),
+                bg_fill_color=self.bg_fill_color,
+                animation=self.anim_var.get(),
+            )
         except Exception:
             pass
         self.player.play(self.anim_var.get())
+        self.idle_ambient_seconds = float(os.getenv("IDLE_AMBIENT_SECONDS", "300"))
+        self._poll_visibility()
+        self.throttle = LoadThrottle(float(os.getenv("CPU_THROTTLE_PERCENT", "75")))
+        self._poll_load()
         self._schedule_tick()
         self.tray = Tray(on_exit=self._exit, on_show=self._show, on_hide=self._hide, on_settings=self._open_settings)
         self.tray.start()
@@ -113,6 +123,10 @@ class PetApp:
         self.player.play(anim)
 
     def _tick(self):
+        if self.throttle.throttled:
+            # 系统繁忙时跳过这一轮主动对话
+            self._schedule_tick()
+            return
         threading.Thread(target=self._worker_tick, daemon=True).start()
 
     def _worker_tick(self):
@@ -124,6 +138,29 @@ class PetApp:
         finally:
             self._schedule_tick()
 
+    def _poll_load(self):
+        # 按"整机 CPU - 本进程 CPU"判断是否有其他程序（如编译）占满 CPU，桌宠主动让路
+        if self.throttle.high <= 0:
+            return
+        # 取样失败（psutil 偶发异常）只跳过这一次，下次照常轮询
+        self.root.after(2000, self._poll_load)
+        load = get_cpu_load()
+        if load is None:
+            return
+        total, own = load
+        if self.throttle.update(max(0.0, total - own)):
+            try:
+                self.player.set_throttled(self.throttle.throttled)
+            except Exception:
+                pass
+            try:
+                print("pet: throttled" if self.throttle.throttled else "pet: resumed", "cpu", round(self.throttle.last_cpu), "throttled total %.0fs" % self.throttle.throttled_seconds())
+            except Exception:
+                pass
+
+    def throttle_stats(self) -> dict:
+        return self.throttle.stats()
+
     def _start_move(self, event):
         self._x = event.x
         self._y = event.y
@@ -150,6 +187,10 @@ class PetApp:
                 self.image_label.configure(bg=self.bg_fill_color)
         except Exception:
             pass
+        try:
+            self.player.set_keying(use_transparent=self.use_transparent, bg_fill_color=self.bg_fill_color)
+        except Exception:
+            pass
 
     def _exit(self):
         try:
@@ -160,14 +201,37 @@ class PetApp:
     def _hide(self):
         try:
             self.root.withdraw()
+            self.root.after(0, lambda: self.player.set_visible(False))
         except Exception:
             pass
 
     def _show(self):
         try:
             self.root.deiconify()
+            self.root.after(0, lambda: self.player.set_visible(True))
+        except Exception:
+            pass
+
+    def _window_visible(self) -> bool:
+        try:
+            if self.root.state() in ("withdrawn", "iconic") or not self.root.winfo_viewable():
+                return False
+            return not is_window_covered(self.root.winfo_id())
+        except Exception:
+            return True
+
+    def _poll_visibility(self):
+        # 窗口不可见时暂停动画；长时间无键鼠输入时降到环境帧率。隐藏期间降低轮询频率
+        visible = self._window_visible()
+        try:
+            self.player.set_visible(visible)
+            idle = get_idle_seconds()
+            self.player.set_ambient(
+                idle is not None and self.idle_ambient_seconds > 0 and idle >= self.idle_ambient_seconds
+            )
         except Exception:
             pass
+        self.root.after(1000 if visible else 2000, self._poll_visibility)
 
     def _open_settings(self):
         try:
@@ -300,6 +364,9 @@ class PetApp:
 
 
 if __name__ == "__main__":
+    # 工具箱的进程池在打包后的 exe 中需要它，子进程才不会再启动一个桌宠
+    import multiprocessing
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = PetApp(root)
     root.mainloop()
@@ -0,0 +1,287 @@
+import bisect
+from collections import deque
+from typing import Tuple
+
+try:
+    from PIL import Image  # type: ignore
+except Exception:
+    Image = None
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None
+
+
+def parse_hex(s: str) -> Tuple[int, int, int]:
+    s = s.strip().lstrip('#')
+    if len(s) == 6:
+        return int(s[0:2], 16), int(s[2:4], 16), int(s[4:6], 16)
+    return 244, 244, 244
+
+
+def _corner_points(w: int, h: int):
+    return [(1, 1), (w - 2, 1), (1, h - 2), (w - 2, h - 2)]
+
+
+def corner_color(arr) -> Tuple[int, int, int, float]:
+    # 角点取内缩 1 像素的位置，避开素材最外圈的描边
+    h, w = arr.shape[:2]
+    cs = [arr[y, x] for x, y in _corner_points(w, h)]
+    r = int(sum([int(c[0]) for c in cs]) / 4)
+    g = int(sum([int(c[1]) for c in cs]) / 4)
+    b = int(sum([int(c[2]) for c in cs]) / 4)
+    a = sum([int(c[3]) for c in cs]) / 4
+    return r, g, b, a
+
+
+def bg_mask(arr, key_rgb: Tuple[int, int, int], bg_threshold: int):
+    rgb = arr[..., :3].astype(np.int16)
+    key = np.array(key_rgb, dtype=np.int16)
+    d = np.abs(rgb - key).sum(axis=2) // 3
+    return d <= bg_threshold
+
+
+def binarize_alpha(arr, alpha_threshold: int):
+    out = arr.copy()
+    out[..., 3] = np.where(arr[..., 3] <= alpha_threshold, 0, 255).astype(np.uint8)
+    return out
+
+
+def composite(arr, mask, key_rgb: Tuple[int, int, int], use_transparent: bool, alpha_threshold: int, bg_fill_color: str):
+    if use_transparent:
+        out = binarize_alpha(arr, alpha_threshold)
+        out[mask] = (key_rgb[0], key_rgb[1], key_rgb[2], 0)
+    else:
+        fr, fg, fb = parse_hex(bg_fill_color)
+        out = arr.copy()
+        out[..., 3] = 255
+        out[mask] = (fr, fg, fb, 255)
+    return out
+
+
+def analyze(arr, bg_threshold: int):
+    # 与透明/填充色/alpha 阈值无关的部分：背景掩码、角点色、是否已抠图
+    r, g, b, a = corner_color(arr)
+    return bg_mask(arr, (r, g, b), bg_threshold), (r, g, b), a < 10
+
+
+def compose(arr, mask, key_rgb: Tuple[int, int, int], prekeyed: bool, use_transparent: bool, alpha_threshold: int, bg_fill_color: str):
+    # 自动检测：角点若已透明，视为素材已抠图；对 alpha 做二值化避免外缘描线
+    if use_transparent and prekeyed:
+        return binarize_alpha(arr, alpha_threshold)
+    return composite(arr, mask, key_rgb, use_transparent, alpha_threshold, bg_fill_color)
+
+
+def key_array(arr, bg_threshold: int, alpha_threshold: int, use_transparent: bool, bg_fill_color: str):
+    r, g, b, a = corner_color(arr)
+    if use_transparent and a < 10:
+        return binarize_alpha(arr, alpha_threshold)
+    mask = bg_mask(arr, (r, g, b), bg_threshold)
+    return composite(arr, mask, (r, g, b), use_transparent, alpha_threshold, bg_fill_color)
+
+
+def key_frame(img, bg_threshold: int, alpha_threshold: int, use_transparent: bool, bg_fill_color: str):
+    if np is None:
+        return key_frame_pixels(img, bg_threshold, alpha_threshold, use_transparent, bg_fill_color)
+    arr = np.asarray(img.convert("RGBA"))
+    out = key_array(arr, bg_threshold, alpha_threshold, use_transparent, bg_fill_color)
+    return Image.fromarray(out, "RGBA")
+
+
+def key_frame_pixels(img, bg_threshold: int, alpha_threshold: int, use_transparent: bool, bg_fill_color: str):
+    # 逐像素参考实现：无 numpy 时的降级路径，也用于校验向量化结果
+    px = img.load()
+    w, h = img.size
+    corner_alpha = [px[x, y][3] for x, y in _corner_points(w, h)]
+    if use_transparent and sum(corner_alpha) / 4 < 10:
+        for y in range(h):
+            for x in range(w):
+                r0, g0, b0, a0 = px[x, y]
+                px[x, y] = (r0, g0, b0, 0 if a0 <= alpha_threshold else 255)
+        return img
+
+    corners = [px[x, y] for x, y in _corner_points(w, h)]
+    r = int(sum([c[0] for c in corners]) / 4)
+    g = int(sum([c[1] for c in corners]) / 4)
+    b = int(sum([c[2] for c in corners]) / 4)
+    fr, fg, fb = parse_hex(bg_fill_color)
+    for y in range(h):
+        for x in range(w):
+            cr, cg, cb, ca = px[x, y]
+            d = (abs(cr - r) + abs(cg - g) + abs(cb - b)) // 3
+            if d <= bg_threshold:
+                if use_transparent:
+                    px[x, y] = (r, g, b, 0)
+                else:
+                    px[x, y] = (fr, fg, fb, 255)
+            else:
+                if use_transparent:
+                    px[x, y] = (cr, cg, cb, 0 if ca <= alpha_threshold else 255)
+                else:
+                    px[x, y] = (cr, cg, cb, 255)
+    return img
+
+
+def near_white(arr, bg_threshold: int):
+    # (255 - 平均亮度) <= 阈值，整数运算与逐像素版本一致
+    s = arr[..., :3].astype(np.int32).sum(axis=2) // 3
+    return (255 - s) <= bg_threshold
+
+
+def border(h: int, w: int):
+    m = np.zeros((h, w), dtype=bool)
+    m[0, :] = m[-1, :] = True
+    m[:, 0] = m[:, -1] = True
+    return m
+
+
+def _dilate8(mask):
+    p = np.pad(mask, 1)
+    h, w = mask.shape
+    out = np.zeros_like(mask)
+    for dy in range(3):
+        for dx in range(3):
+            out |= p[dy:dy + h, dx:dx + w]
+    return out
+
+
+def flood_fill(candidate, seeds):
+    # 8 邻接泛洪：结果 = 种子 ∪ 与种子相连的 candidate 连通区域。
+    # 按行把 candidate 切成游程，在游程之间做 BFS（相邻行区间有重叠或对角相接即连通），
+    # Python 层只遍历游程而不是像素
+    h, w = candidate.shape
+    start = candidate & (seeds | _dilate8(seeds & ~candidate))
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    padded[:, 1:-1] = candidate
+    d = np.diff(padded, axis=1)
+    ys, xs = np.nonzero(d == 1)
+    _, xe = np.nonzero(d == -1)
+    if not len(ys):
+        return seeds.copy()
+    row_start = np.searchsorted(ys, np.arange(h + 1))
+    cs = np.zeros((h, w + 1), dtype=np.int32)
+    np.cumsum(start, axis=1, out=cs[:, 1:])
+    hit = (cs[ys, xe] - cs[ys, xs]) > 0
+    stack = np.flatnonzero(hit).tolist()
+    seen = hit.tolist()
+    ys_l, xs_l, xe_l = ys.tolist(), xs.tolist(), xe.tolist()
+    rs = row_start.tolist()
+    while stack:
+        i = stack.pop()
+        y, a, b = ys_l[i], xs_l[i], xe_l[i]
+        for ny in (y - 1, y + 1):
+            if ny < 0 or ny >= h:
+                continue
+            lo, hi = rs[ny], rs[ny + 1]
+            # 相邻行中 xe > a-1 且 xs < b+1 的游程与当前游程 8 邻接
+            j = bisect.bisect_right(xe_l, a - 1, lo, hi)
+            while j < hi and xs_l[j] < b + 1:
+                if not seen[j]:
+                    seen[j] = True
+                    stack.append(j)
+                j += 1
+    seen = np.array(seen, dtype=bool)
+    edges = np.zeros((h, w + 1), dtype=np.int32)
+    np.add.at(edges, (ys[seen], xs[seen]), 1)
+    np.add.at(edges, (ys[seen], xe[seen]), -1)
+    return (np.cumsum(edges, axis=1)[:, :w] > 0) | seeds
+
+
+def erode4(mask, iterations: int = 1):
+    # 4 邻接腐蚀：图像外视为背景，只有邻居全在掩码内的像素保留
+    for _ in range(max(0, int(iterations))):
+        p = np.pad(mask, 1, constant_values=True)
+        mask = mask & p[:-2, 1:-1] & p[2:, 1:-1] & p[1:-1, :-2] & p[1:-1, 2:]
+    return mask
+
+
+def apply_alpha(arr, mask, alpha_threshold: int):
+    # 只改 alpha：背景置 0，其余按阈值二值化，RGB 保持不变
+    out = arr.copy()
+    out[..., 3] = np.where(mask | (arr[..., 3] <= alpha_threshold), 0, 255).astype(np.uint8)
+    return out
+
+
+def remove_background(arr, bg_threshold: int, alpha_threshold: int, edge_shrink: int = 1):
+    # 抠图工具的算法：角点已透明时从整条边缘的近白像素泛洪，否则以四角均色为背景从四角泛洪
+    h, w = arr.shape[:2]
+    corners = [arr[0, 0], arr[0, w - 1], arr[h - 1, 0], arr[h - 1, w - 1]]
+    if sum(int(c[3]) for c in corners) / 4 < 10:
+        candidate = (arr[..., 3] > alpha_threshold) & near_white(arr, bg_threshold)
+        seeds = candidate & border(h, w)
+    else:
+        key = tuple(int(sum(int(c[i]) for c in corners) / 4) for i in range(3))
+        candidate = bg_mask(arr, key, bg_threshold)
+        seeds = np.zeros((h, w), dtype=bool)
+        for y, x in [(0, 0), (0, w - 1), (h - 1, 0), (h - 1, w - 1)]:
+            seeds[y, x] = candidate[y, x]
+    mask = erode4(flood_fill(candidate, seeds), edge_shrink)
+    return apply_alpha(arr, mask, alpha_threshold)
+
+
+def remove_background_pixels(img, bg_threshold: int, alpha_threshold: int, edge_shrink: int = 1):
+    # 逐像素参考实现（原 deque 泛洪 + 逐像素腐蚀），原地修改并返回 img；用于校验 remove_background
+    px = img.load()
+    w, h = img.size
+    ca = [px[0, 0][3], px[w - 1, 0][3], px[0, h - 1][3], px[w - 1, h - 1][3]]
+    mask = [[False] * w for _ in range(h)]
+    dirs = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]
+
+    def white(r: int, g: int, b: int) -> bool:
+        return (255 - (r + g + b) // 3) <= bg_threshold
+
+    if sum(ca) / 4 < 10:
+        # 角落已透明：整条边缘的近白像素作为种子
+        seeds = []
+        for x in range(w):
+            for y in (0, h - 1):
+                r, g, b, a = px[x, y]
+                if a > alpha_threshold and white(r, g, b):
+                    seeds.append((x, y))
+        for y in range(h):
+            for x in (0, w - 1):
+                r, g, b, a = px[x, y]
+                if a > alpha_threshold and white(r, g, b):
+                    seeds.append((x, y))
+
+        def near(p):
+            return p[3] > alpha_threshold and white(p[0], p[1], p[2])
+    else:
+        # 角落不透明：四角均色为背景，从四角泛洪
+        corners = [px[0, 0], px[w - 1, 0], px[0, h - 1], px[w - 1, h - 1]]
+        br, bg, bb = (int(sum([c[i] for c in corners]) / 4) for i in range(3))
+
+        def near(p):
+            return (abs(p[0] - br) + abs(p[1] - bg) + abs(p[2] - bb)) // 3 <= bg_threshold
+        seeds = [s for s in [(0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1)] if near(px[s])]
+    q = deque(seeds)
+    for sx, sy in seeds:
+        mask[sy][sx] = True
+    while q:
+        x, y = q.popleft()
+        for dx, dy in dirs:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < w and 0 <= ny < h and not mask[ny][nx] and near(px[nx, ny]):
+                mask[ny][nx] = True
+                q.append((nx, ny))
+    for _ in range(max(0, int(edge_shrink))):
+        shrink = [row[:] for row in mask]
+        for y in range(h):
+            for x in range(w):
+                if not mask[y][x]:
+                    continue
+                for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < w and 0 <= ny < h and not mask[ny][nx]:
+                        shrink[y][x] = False
+                        break
+        mask = shrink
+    for y in range(h):
+        for x in range(w):
+            r0, g0, b0, a0 = px[x, y]
+            if mask[y][x]:
+                px[x, y] = (r0, g0, b0, 0)
+            else:
+                px[x, y] = (r0, g0, b0, 0 if a0 <= alpha_threshold else 255)
+    return img
@@ -25,3 +25,8 @@ def save_config(cfg: Dict[str, Any]) -> None:
             json.dump(cfg, f, ensure_ascii=False, indent=2)
     except Exception:
         pass
+
+def cache_dir(name: str) -> str:
+    d = os.path.join(os.path.dirname(config_path()), "cache", name)
+    os.makedirs(d, exist_ok=True)
+    return d
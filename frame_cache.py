@@ -0,0 +1,134 @@
+import os
+import json
+import zlib
+import struct
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    from PIL import Image  # type: ignore
+except Exception:
+    Image = None
+
+from config_store import cache_dir
+
+_MAGIC = b"XLFC"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBHH")
+
+
+class FrameCache:
+    # 处理后帧的磁盘缓存：每帧一个文件，按源文件路径/mtime/大小 + 处理参数寻址
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = root or cache_dir("frames")
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("FRAME_CACHE_MB", "128")) * 1024 * 1024)
+        self.max_bytes = max(0, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and Image is not None
+
+    def key(self, path: str, params: Dict[str, Any]) -> Optional[str]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        raw = json.dumps(
+            [os.path.abspath(path), st.st_mtime_ns, st.st_size, sorted(params.items())],
+            ensure_ascii=False,
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key + ".bin")
+
+    def contains(self, key: Optional[str]) -> bool:
+        # 只检查条目是否存在，不读取不解压
+        if not key or not self.enabled:
+            return False
+        return os.path.exists(self._path(key))
+
+    def get(self, key: Optional[str]):
+        if not key or not self.enabled:
+            return None
+        p = self._path(key)
+        try:
+            with open(p, "rb") as f:
+                data = f.read()
+            magic, ver, w, h = _HEADER.unpack_from(data)
+            if magic != _MAGIC or ver != _VERSION:
+                raise ValueError("bad cache entry")
+            img = Image.frombytes("RGBA", (w, h), zlib.decompress(data[_HEADER.size:]))
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # 命中即刷新 mtime，淘汰时按最近使用排序
+            os.utime(p, None)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return img
+
+    def put(self, key: Optional[str], img) -> None:
+        if not key or not self.enabled:
+            return
+        p = self._path(key)
+        tmp = f"{p}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            img = img.convert("RGBA")
+            w, h = img.size
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, w, h))
+                f.write(zlib.compress(img.tobytes(), 1))
+            os.replace(tmp, p)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def prune(self) -> None:
+        if self.max_bytes <= 0:
+            return
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.root) as it:
+                for e in it:
+                    if not e.name.endswith(".bin"):
+                        continue
+                    try:
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, e.path))
+                    total += st.st_size
+        except OSError:
+            return
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,110 @@
+from typing import Callable, List, Optional, Tuple
+
+try:
+    from PIL import Image  # type: ignore
+except Exception:
+    Image = None
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None
+
+
+def diff_bbox(a, b) -> Optional[Tuple[int, int, int, int]]:
+    # 两帧任一通道有差异的最小包围框 (x0, y0, x1, y1)，完全相同返回 None
+    if a.shape != b.shape:
+        h, w = b.shape[:2]
+        return 0, 0, w, h
+    changed = (a != b).any(axis=2)
+    rows = np.flatnonzero(changed.any(axis=1))
+    if not rows.size:
+        return None
+    cols = np.flatnonzero(changed.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+class DeltaSequence:
+    # 差分播放：一张关键帧 + 每帧相对上一帧的变化区域补丁，
+    # 屏幕上始终只有一个 PhotoImage，每次 tick 只把变化区域拷进去
+    def __init__(self, make_photo: Callable, blit: Callable):
+        self.make_photo = make_photo
+        self.blit = blit
+        self.key = None
+        self.display = None
+        self.patches: List = []
+        self.wrap = None
+        self.shown: Optional[int] = None
+        self.patch_pixels = 0
+        self._first = None
+        self._last = None
+
+    def __len__(self) -> int:
+        return len(self.patches)
+
+    def _patch(self, img, prev, cur):
+        box = diff_bbox(prev, cur)
+        if box is None:
+            return None
+        x0, y0, x1, y1 = box
+        self.patch_pixels += (x1 - x0) * (y1 - y0)
+        return x0, y0, self.make_photo(img.crop(box))
+
+    def append(self, img, arr):
+        if self.key is None:
+            self.key = self.make_photo(img)
+            self.display = self.make_photo(img)
+            self.patches.append(None)
+            self.shown = 0
+            self._first = arr
+        else:
+            self.patches.append(self._patch(img, self._last, arr))
+        self._last = arr
+
+    def close_loop(self):
+        # 序列加载完成后补上"末帧 → 首帧"的补丁，循环时不必整帧重置
+        if self._first is None or len(self.patches) < 2:
+            return
+        first = Image.fromarray(self._first, "RGBA")
+        wrap = self._patch(first, self._last, self._first)
+        self.wrap = wrap if wrap is not None else False
+
+    def _apply(self, patch):
+        if patch:
+            x, y, photo = patch
+            self.blit(self.display, photo, x, y)
+
+    def _reset(self):
+        self.blit(self.display, self.key, 0, 0)
+        self.shown = 0
+
+    def show(self, index: int):
+        n = len(self.patches)
+        if self.display is None or not n:
+            return None
+        index %= n
+        cur = self.shown
+        if cur == index:
+            return self.display
+        forward = (index - cur) % n if cur is not None else n
+        wraps = cur is not None and index < cur
+        if cur is None or forward > index or (wraps and self.wrap is None):
+            # 从关键帧重放比沿差分链前进更省时，或尚无首尾衔接补丁
+            self._reset()
+            cur = 0
+        while cur != index:
+            cur = (cur + 1) % n
+            self._apply(self.wrap if cur == 0 else self.patches[cur])
+        self.shown = index
+        return self.display
+
+    def stats(self) -> dict:
+        full = 0
+        if self._first is not None:
+            h, w = self._first.shape[:2]
+            full = w * h
+        return {
+            "frames": len(self.patches),
+            "patch_pixels": self.patch_pixels,
+            "full_pixels": full * len(self.patches),
+        }
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from typing import Callable, List, Tuple
+
+
+def paste_over(dst, src, x: int, y: int):
+    # alpha_composite 不接受负偏移：超出左/上边界的部分先裁掉
+    sx, sy = max(0, -x), max(0, -y)
+    x, y = max(0, x), max(0, y)
+    w = min(src.size[0] - sx, dst.size[0] - x)
+    h = min(src.size[1] - sy, dst.size[1] - y)
+    if w <= 0 or h <= 0:
+        return
+    dst.alpha_composite(src, (x, y), (sx, sy, sx + w, sy + h))
+
+
+class LayeredSequence:
+    # 分层片段：一套身体序列 + 若干小块叠加层（表情/道具），播放时按帧合成，
+    # 合成结果放进有字节上限的 LRU；叠加层帧数不足时按帧号取模循环
+    def __init__(self, base: List, overlays: List[Tuple[List, int, int]], make_photo: Callable, max_bytes: int, key=None):
+        self.key = key
+        self.base = base
+        self.overlays = overlays
+        self.make_photo = make_photo
+        self.max_bytes = max(1, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def compose(self, index: int):
+        out = self.base[index].copy()
+        for imgs, x, y in self.overlays:
+            paste_over(out, imgs[index % len(imgs)], x, y)
+        return out
+
+    def show(self, index: int):
+        if not self.base:
+            return None
+        index %= len(self.base)
+        entry = self._cache.get(index)
+        if entry is not None:
+            self._cache.move_to_end(index)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        img = self.compose(index)
+        nbytes = img.size[0] * img.size[1] * 4
+        photo = self.make_photo(img)
+        self._cache[index] = (photo, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes and len(self._cache) > 1:
+            _, (_, n) = self._cache.popitem(last=False)
+            self._bytes -= n
+        return photo
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "frames": len(self.base),
+            "overlays": len(self.overlays),
+            "resident": len(self._cache),
+            "resident_bytes": self._bytes,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
@@ -0,0 +1,130 @@
+import os
+import json
+import mmap
+import zlib
+import struct
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    from PIL import Image  # type: ignore
+except Exception:
+    Image = None
+
+from bg_keying import analyze, np
+from frame_watch import ordered_paths, scan_images
+
+PACK_EXT = ".xlpk"
+_MAGIC = b"XLPK"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBI")
+
+
+def _resize(img, size: int):
+    w, h = img.size
+    if size > 0 and size != w:
+        img = img.resize((size, max(1, int(h * size / w))), Image.LANCZOS)
+    return img
+
+
+def build_pack(
+    src_dir: str,
+    out_path: str,
+    sizes: Sequence[int] = (96, 128, 160, 256),
+    bg_threshold: int = 30,
+    master_size: int = 256,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    # 打包时预处理：每个尺寸存未抠图的 RGBA 与背景掩码（各自 zlib 压缩），
+    # 运行时只需解压 + 合成，透明/填充色/alpha 阈值仍可随时切换。
+    # 缩放流程与播放器一致（源图 → master_size 母版 → 目标尺寸），结果与直接加载逐像素相同
+    paths = ordered_paths(scan_images(src_dir), src_dir)
+    sizes = sorted(set(int(s) for s in sizes if int(s) > 0))
+    index: Dict[str, List] = {str(s): [] for s in sizes}
+    blobs: List[bytes] = []
+    offset = 0
+    for n, p in enumerate(paths):
+        src = Image.open(p).convert("RGBA")
+        master = _resize(src, master_size) if src.size[0] > master_size else src
+        for s in sizes:
+            img = _resize(master if s <= master_size else src, s)
+            arr = np.asarray(img)
+            mask, key_rgb, prekeyed = analyze(arr, bg_threshold)
+            data = zlib.compress(arr.tobytes(), 6)
+            bits = zlib.compress(np.packbits(mask).tobytes(), 6)
+            h, w = arr.shape[:2]
+            index[str(s)].append([offset, len(data), len(bits), w, h, list(key_rgb), bool(prekeyed)])
+            blobs.append(data)
+            blobs.append(bits)
+            offset += len(data) + len(bits)
+        if progress:
+            progress(n + 1, len(paths))
+    meta = json.dumps(
+        {
+            "bg_threshold": bg_threshold,
+            "master_size": master_size,
+            "frames": len(paths),
+            "names": [os.path.basename(p) for p in paths],
+            "sizes": index,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(meta)))
+        f.write(meta)
+        for b in blobs:
+            f.write(b)
+    os.replace(tmp, out_path)
+    return {"frames": len(paths), "sizes": sizes, "bytes": os.path.getsize(out_path)}
+
+
+class FramePack:
+    # 只读打开预编译帧包：文件整体 mmap，逐帧按需解压，不占额外内存
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, meta_len = _HEADER.unpack_from(self._mm, 0)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError("not a frame pack: " + path)
+            start = _HEADER.size
+            meta = json.loads(bytes(self._mm[start:start + meta_len]).decode("utf-8"))
+        except Exception:
+            self._file.close()
+            raise
+        self._base = start + meta_len
+        self.bg_threshold = int(meta["bg_threshold"])
+        self.master_size = int(meta.get("master_size") or 0)
+        self.frame_count = int(meta["frames"])
+        self._sizes = {int(k): v for k, v in meta["sizes"].items()}
+        self.sizes = sorted(self._sizes)
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def best_size(self, size: int) -> int:
+        # 优先完全匹配；其次从母版尺寸派生，与直接加载的缩放流程一致；
+        # 再次取比目标大的最小尺寸（缩小质量更好），都没有则取最大的
+        if size in self._sizes:
+            return size
+        if self.master_size in self._sizes and size <= self.master_size:
+            return self.master_size
+        bigger = [s for s in self.sizes if s >= size]
+        return bigger[0] if bigger else self.sizes[-1]
+
+    def layer(self, size: int, index: int):
+        # 返回 (RGBA 数组, 背景掩码, 角点色, 是否已抠图)
+        offset, n_data, n_bits, w, h, key_rgb, prekeyed = self._sizes[size][index]
+        pos = self._base + offset
+        arr = np.frombuffer(zlib.decompress(self._mm[pos:pos + n_data]), dtype=np.uint8).reshape(h, w, 4)
+        pos += n_data
+        bits = np.frombuffer(zlib.decompress(self._mm[pos:pos + n_bits]), dtype=np.uint8)
+        mask = np.unpackbits(bits, count=w * h).reshape(h, w).astype(bool)
+        return arr, mask, tuple(key_rgb), bool(prekeyed)
+
+    def close(self):
+        try:
+            self._mm.close()
+        finally:
+            self._file.close()
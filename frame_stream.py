@@ -0,0 +1,114 @@
+import threading
+from typing import Callable, Dict, List
+
+
+class FrameStream:
+    # 流式播放：只在内存中保留当前帧之后的一段预取窗口，由后台线程提前解码
+    def __init__(self, paths: List[str], loader: Callable[[str], object], max_bytes: int, min_window: int = 2):
+        self.paths = list(paths)
+        self.loader = loader
+        self.max_bytes = max(1, int(max_bytes))
+        self.min_window = max(1, int(min_window))
+        self.hits = 0
+        self.misses = 0
+        self.peak_bytes = 0
+        self._frames: Dict[int, object] = {}
+        self._sizes: Dict[int, int] = {}
+        self._frame_bytes = 0
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="frame-stream", daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @property
+    def window(self) -> int:
+        n = len(self.paths)
+        if not self._frame_bytes:
+            return min(n, self.min_window)
+        return max(1, min(n, max(self.min_window, self.max_bytes // self._frame_bytes)))
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def get(self, index: int):
+        # 主线程调用：命中则返回图像，未命中返回 None，由调用方保持上一帧
+        with self._lock:
+            self._cursor = index
+            img = self._frames.get(index)
+            if img is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        self._wake.set()
+        return img
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "frames": len(self.paths),
+                "window": self.window,
+                "resident": len(self._frames),
+                "resident_bytes": sum(self._sizes.values()),
+                "peak_bytes": self.peak_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        with self._lock:
+            self._frames.clear()
+            self._sizes.clear()
+
+    def _wanted(self) -> List[int]:
+        n = len(self.paths)
+        cur = self._cursor
+        return [(cur + i) % n for i in range(self.window)]
+
+    def _run(self):
+        while not self._closed:
+            with self._lock:
+                wanted = self._wanted()
+                keep = set(wanted)
+                for i in [i for i in self._frames if i not in keep]:
+                    self._frames.pop(i, None)
+                    self._sizes.pop(i, None)
+                todo = [i for i in wanted if i not in self._frames]
+            if not todo:
+                self._wake.wait(0.5)
+                self._wake.clear()
+                continue
+            i = todo[0]
+            try:
+                img = self.loader(self.paths[i])
+            except Exception:
+                img = None
+            if self._closed:
+                break
+            if img is None:
+                # 坏帧用空位占住，避免反复解码同一个文件
+                img = False
+            nbytes = 0
+            if img is not False:
+                try:
+                    w, h = img.size
+                    nbytes = w * h * 4
+                except Exception:
+                    nbytes = 0
+            with self._lock:
+                if nbytes and not self._frame_bytes:
+                    self._frame_bytes = nbytes
+                if i in set(self._wanted()):
+                    self._frames[i] = img
+                    self._sizes[i] = nbytes
+                    self.peak_bytes = max(self.peak_bytes, sum(self._sizes.values()))
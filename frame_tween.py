@@ -0,0 +1,22 @@
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None
+
+
+def crossfade(a, b, t: float):
+    # 按 t 混合两帧：颜色按各自 alpha 加权，只有一侧不透明的像素直接取该侧颜色；
+    # alpha 过半即视为不透明，和二值化后的素材一样不产生半透明边缘
+    af = a.astype(np.float32)
+    bf = b.astype(np.float32)
+    wa = (1.0 - t) * af[..., 3:4] / 255.0
+    wb = t * bf[..., 3:4] / 255.0
+    total = wa + wb
+    mixed = (af[..., :3] * wa + bf[..., :3] * wb) / np.maximum(total, 1e-6)
+    plain = af[..., :3] * (1.0 - t) + bf[..., :3] * t
+    rgb = np.where(total > 0, mixed, plain)
+    alpha = af[..., 3] * (1.0 - t) + bf[..., 3] * t
+    out = np.empty_like(a)
+    out[..., :3] = np.clip(rgb + 0.5, 0, 255).astype(np.uint8)
+    out[..., 3] = np.where(alpha >= 128, 255, 0).astype(np.uint8)
+    return out
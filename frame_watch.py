@@ -0,0 +1,50 @@
+import os
+import re
+from typing import Dict, List, Tuple
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def natural_key(path: str) -> list:
+    # frame_2 排在 frame_10 之前
+    parts = _DIGITS.split(path.lower())
+    return [int(p) if p.isdigit() else p for p in parts]
+
+
+def scan_images(root: str, recursive: bool = False) -> Dict[str, Tuple[int, int]]:
+    # 目录下图片文件 → (mtime_ns, size)；只看扩展名，不打开文件
+    found: Dict[str, Tuple[int, int]] = {}
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir():
+                        if recursive:
+                            stack.append(e.path)
+                        continue
+                    if os.path.splitext(e.name)[1].lower() not in IMAGE_EXTS:
+                        continue
+                    st = e.stat()
+                except OSError:
+                    continue
+                found[e.path] = (st.st_mtime_ns, st.st_size)
+    return found
+
+
+def ordered_paths(index: Dict[str, Tuple[int, int]], root: str) -> List[str]:
+    return sorted(index, key=lambda p: natural_key(os.path.relpath(p, root)))
+
+
+def diff_index(old: Dict[str, Tuple[int, int]], new: Dict[str, Tuple[int, int]]) -> Tuple[List[str], List[str]]:
+    # 返回 (新增或修改的文件, 已删除的文件)
+    changed = [p for p, sig in new.items() if old.get(p) != sig]
+    removed = [p for p in old if p not in new]
+    return changed, removed
@@ -0,0 +1,55 @@
+import time
+from typing import Optional
+
+
+class LoadThrottle:
+    # 其他程序的 CPU 占用达到 high 即进入限速；降到 low 以下并持续 cool_seconds 才恢复，避免来回抖动
+    def __init__(self, high: float = 75.0, low: Optional[float] = None, cool_seconds: float = 10.0):
+        self.high = float(high)
+        self.low = float(low) if low is not None else max(0.0, self.high - 15.0)
+        self.cool_seconds = float(cool_seconds)
+        self.throttled = False
+        self.episodes = 0
+        self.last_cpu = 0.0
+        self._since: Optional[float] = None
+        self._calm_since: Optional[float] = None
+        self._total = 0.0
+
+    def update(self, cpu: float, now: Optional[float] = None) -> bool:
+        # 返回状态是否发生切换
+        now = time.monotonic() if now is None else now
+        self.last_cpu = float(cpu)
+        if not self.throttled:
+            if cpu >= self.high:
+                self.throttled = True
+                self.episodes += 1
+                self._since = now
+                self._calm_since = None
+                return True
+            return False
+        if cpu >= self.low:
+            self._calm_since = None
+            return False
+        if self._calm_since is None:
+            self._calm_since = now
+        if now - self._calm_since < self.cool_seconds:
+            return False
+        self.throttled = False
+        self._total += now - self._since
+        self._since = None
+        return True
+
+    def throttled_seconds(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        if self._since is None:
+            return self._total
+        return self._total + (now - self._since)
+
+    def stats(self, now: Optional[float] = None) -> dict:
+        return {
+            "throttled": self.throttled,
+            "throttled_seconds": self.throttled_seconds(now),
+            "episodes": self.episodes,
+            "cpu_others": self.last_cpu,
+            "threshold": self.high,
+        }
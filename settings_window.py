@@ -3,7 +3,7 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from animation_player import AnimationPlayer
 from config_store import load_config, save_config
-from tools_bg_remove import batch_remove_white_bg
+from tools_bg_remove import start_remove_white_bg
 
 class SettingsWindow:
     def __init__(self, app, active_tab: str = None):
@@ -78,10 +78,16 @@ class SettingsWindow:
         # Animation Dir
         ttk.Label(grp_look, text="动画目录:").grid(row=0, column=0, sticky="w", pady=5)
         init_cfg = load_config()
-        default_dir = init_cfg.get("frames_dir") or os.path.join(os.path.abspath(os.path.dirname(__file__)), "default_frames")
+        # 以播放器当前实际使用的来源为准：打包版里是内置帧包，exe 中并没有 default_frames 目录
+        default_dir = (
+            getattr(self.app.player, "frames_dir", None)
+            or init_cfg.get("frames_dir")
+            or os.path.join(os.path.abspath(os.path.dirname(__file__)), "default_frames")
+        )
         self.dir_var = tk.StringVar(value=str(default_dir))
         ttk.Entry(grp_look, textvariable=self.dir_var).grid(row=0, column=1, sticky="we", padx=5)
         ttk.Button(grp_look, text="浏览...", command=self._choose_dir, width=8).grid(row=0, column=2, sticky="e")
+        ttk.Button(grp_look, text="动图...", command=self._choose_anim_file, width=8).grid(row=0, column=3, sticky="e")
 
         # FPS
         ttk.Label(grp_look, text="帧速 (FPS):").grid(row=1, column=0, sticky="w", pady=5)
@@ -190,7 +196,8 @@ class SettingsWindow:
         grp_tool.columnconfigure(1, weight=1)
 
         # Action
-        ttk.Button(grp_tool, text="开始执行处理", command=self._run_batch).grid(row=3, column=0, columnspan=3, sticky="we", pady=10)
+        ttk.Button(grp_tool, text="开始执行处理", command=self._run_batch).grid(row=3, column=0, columnspan=2, sticky="we", pady=10)
+        ttk.Button(grp_tool, text="取消", command=lambda: self._cancel_job("_batch_job")).grid(row=3, column=2, sticky="we", pady=10)
 
         # Status
         self.batch_status = tk.StringVar(value="准备就绪")
@@ -220,7 +227,8 @@ class SettingsWindow:
         ttk.Entry(grp_wm_img, textvariable=self.wm_img_limit, width=6).grid(row=2, column=1, sticky="w")
         ttk.Label(grp_wm_img, text="强度").grid(row=2, column=2, sticky="w")
         ttk.Entry(grp_wm_img, textvariable=self.wm_img_strength, width=6).grid(row=2, column=3, sticky="w")
-        ttk.Button(grp_wm_img, text="开始去水印", command=self._run_wm_images).grid(row=3, column=0, columnspan=4, sticky="we", pady=6)
+        ttk.Button(grp_wm_img, text="开始去水印", command=self._run_wm_images).grid(row=3, column=0, columnspan=3, sticky="we", pady=6)
+        ttk.Button(grp_wm_img, text="取消", command=lambda: self._cancel_job("_wm_job")).grid(row=3, column=3, sticky="we", pady=6)
         self.wm_img_status = tk.StringVar(value="")
         ttk.Label(grp_wm_img, textvariable=self.wm_img_status).grid(row=4, column=0, columnspan=4, sticky="w")
         grp_wm_img.columnconfigure(1, weight=1)
@@ -246,6 +254,27 @@ class SettingsWindow:
         ttk.Label(grp_wm_vid, textvariable=self.wm_vid_status).grid(row=4, column=0, columnspan=4, sticky="w")
         grp_wm_vid.columnconfigure(1, weight=1)
 
+        grp_vid_imp = ttk.LabelFrame(self.tools_body, text="视频转动画帧", padding=10)
+        grp_vid_imp.pack(fill="x", expand=False, pady=10)
+        self.vid_imp_src = tk.StringVar(value="")
+        self.vid_imp_dst = tk.StringVar(value="")
+        self.vid_imp_fps = tk.StringVar(value=os.getenv("ANIMATION_FPS", "12"))
+        self.vid_imp_size = tk.StringVar(value=os.getenv("PET_SIZE", "128"))
+        ttk.Label(grp_vid_imp, text="源视频").grid(row=0, column=0, sticky="w")
+        ttk.Entry(grp_vid_imp, textvariable=self.vid_imp_src).grid(row=0, column=1, sticky="we")
+        ttk.Button(grp_vid_imp, text="选择", command=self._pick_vid_imp_src).grid(row=0, column=2)
+        ttk.Label(grp_vid_imp, text="保存到").grid(row=1, column=0, sticky="w")
+        ttk.Entry(grp_vid_imp, textvariable=self.vid_imp_dst).grid(row=1, column=1, sticky="we")
+        ttk.Button(grp_vid_imp, text="选择", command=self._pick_vid_imp_dst).grid(row=1, column=2)
+        ttk.Label(grp_vid_imp, text="帧率").grid(row=2, column=0, sticky="w")
+        ttk.Entry(grp_vid_imp, textvariable=self.vid_imp_fps, width=6).grid(row=2, column=1, sticky="w")
+        ttk.Label(grp_vid_imp, text="尺寸").grid(row=2, column=2, sticky="w")
+        ttk.Entry(grp_vid_imp, textvariable=self.vid_imp_size, width=6).grid(row=2, column=3, sticky="w")
+        ttk.Button(grp_vid_imp, text="开始导入", command=self._run_vid_import).grid(row=3, column=0, columnspan=4, sticky="we", pady=6)
+        self.vid_imp_status = tk.StringVar(value="")
+        ttk.Label(grp_vid_imp, textvariable=self.vid_imp_status).grid(row=4, column=0, columnspan=4, sticky="w")
+        grp_vid_imp.columnconfigure(1, weight=1)
+
     def _choose_dir(self):
         d = filedialog.askdirectory()
         if d:
@@ -257,6 +286,11 @@ class SettingsWindow:
             # Let's NOT auto apply to avoid jarring changes while browsing.
             # But the user might expect it. Let's keep it safe: just set var.
 
+    def _choose_anim_file(self):
+        p = filedialog.askopenfilename(filetypes=[("动图", ".gif .webp .png .apng")])
+        if p:
+            self.dir_var.set(p)
+
     def _apply(self):
         d = self.dir_var.get().strip()
         fps = int(self.fps_var.get().strip() or "12")
@@ -278,15 +312,14 @@ class SettingsWindow:
         cfg["use_transparent"] = bool(self.transparent_var.get())
         save_config(cfg)
 
-        # Update Player
-        self.app.player.set_fps(fps)
-        if d:
-            self.app.player.set_frames_dir(d)
-        self.app.player.set_pet_size(size)
+        # Update Player: one batched configure, at most one reload
+        use_t = bool(self.transparent_var.get())
+        self.app.player.configure(frames_dir=d or None, fps=fps, pet_size=size, use_transparent=use_t)
+        if self.app.player.pet_size < size:
+            self.size_var.set(str(self.app.player.pet_size))
+            messagebox.showinfo("提示", f"当前帧包最大支持 {self.app.player.pet_size} 像素，已按该尺寸显示；更大尺寸请选择原始帧目录。")
         try:
-            use_t = bool(self.transparent_var.get())
             self.app.set_transparency(use_t)
-            self.app.player.set_use_transparent(use_t)
         except Exception:
             pass
         
@@ -372,23 +405,53 @@ class SettingsWindow:
 
         self.batch_status.set("正在处理中，请稍候...")
         import threading
+        def done(job):
+            ok, fail = job.ok, job.fail
+            if job.cancelled:
+                self._post(lambda: self.batch_status.set(f"已取消：{ok} 张成功，{fail} 张失败"))
+                return
+            self._post(lambda: self.batch_status.set(f"处理完成：{ok} 张成功，{fail} 张失败"))
+            self._post(lambda: messagebox.showinfo("完成", f"处理完成！\n成功: {ok}\n失败: {fail}\n位置: {dst}"))
+
         def work():
             try:
-                ok, fail = batch_remove_white_bg(src, dst, limit, bg, alpha, True, edge_shrink=shrink)
-                self.top.after(0, lambda: self.batch_status.set(f"处理完成：{ok} 张成功，{fail} 张失败"))
-                self.top.after(0, lambda: messagebox.showinfo("完成", f"处理完成！\n成功: {ok}\n失败: {fail}\n位置: {dst}"))
+                self._batch_job = start_remove_white_bg(
+                    src, dst, limit, bg, alpha, True, edge_shrink=shrink,
+                    on_progress=lambda job, p, err: self._post(lambda: self.batch_status.set(self._job_text(job))),
+                    on_done=done,
+                )
             except Exception as e:
-                self.top.after(0, lambda: self.batch_status.set(f"处理出错: {str(e)}"))
+                msg = f"处理出错: {e}"
+                self._post(lambda: self.batch_status.set(msg))
 
         threading.Thread(target=work, daemon=True).start()
 
+    def _post(self, fn):
+        # 任务回调在后台线程，统一转回 Tk 线程；窗口已关闭时忽略
+        try:
+            self.top.after(0, fn)
+        except Exception:
+            pass
+
+    def _job_text(self, job) -> str:
+        s = f"处理中 {job.done}/{job.total}，失败 {job.fail}"
+        if job.errors:
+            p, reason = job.errors[-1]
+            s += f"（{os.path.basename(p)}: {reason}）"
+        return s
+
+    def _cancel_job(self, attr: str):
+        job = getattr(self, attr, None)
+        if job is not None and not job.finished.is_set():
+            job.cancel()
+
     def _pick_icon(self):
         pass
 
     def _ensure_app_icon(self):
         import os
         from PIL import Image
-        from collections import deque
+        from bg_keying import apply_alpha, border, flood_fill, near_white, np
         proj_dir = os.path.abspath(os.path.dirname(__file__))
         dest_png = os.path.join(proj_dir, "app_icon.png")
         dest_ico = os.path.join(proj_dir, "app_icon.ico")
@@ -404,46 +467,11 @@ class SettingsWindow:
             return
         im = Image.open(src).convert("RGBA")
         w, h = im.size
-        px = im.load()
-        def near_white(r, g, b, thr=30):
-            return (255 - (r + g + b) // 3) <= thr
-        mask = [[False] * w for _ in range(h)]
-        seeds = []
-        for x in range(w):
-            r, g, b, a = px[x, 0]
-            if near_white(r, g, b):
-                seeds.append((x, 0))
-            r, g, b, a = px[x, h - 1]
-            if near_white(r, g, b):
-                seeds.append((x, h - 1))
-        for y in range(h):
-            r, g, b, a = px[0, y]
-            if near_white(r, g, b):
-                seeds.append((0, y))
-            r, g, b, a = px[w - 1, y]
-            if near_white(r, g, b):
-                seeds.append((w - 1, y))
-        q = deque([])
-        for sx, sy in seeds:
-            mask[sy][sx] = True
-            q.append((sx, sy))
-        dirs = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]
-        while q:
-            x, y = q.popleft()
-            for dx, dy in dirs:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < w and 0 <= ny < h and not mask[ny][nx]:
-                    r1, g1, b1, a1 = px[nx, ny]
-                    if a1 > 16 and near_white(r1, g1, b1):
-                        mask[ny][nx] = True
-                        q.append((nx, ny))
-        for y in range(h):
-            for x in range(w):
-                r0, g0, b0, a0 = px[x, y]
-                if mask[y][x]:
-                    px[x, y] = (r0, g0, b0, 0)
-                else:
-                    px[x, y] = (r0, g0, b0, 255 if a0 > 16 else 0)
+        # 从整条边缘的近白像素泛洪出背景，alpha 过低的像素不参与扩展
+        arr = np.asarray(im)
+        white = near_white(arr, 30)
+        mask = flood_fill(white & (arr[..., 3] > 16), white & border(h, w))
+        im = Image.fromarray(apply_alpha(arr, mask, 16), "RGBA")
         ratio = min(900 / w, 900 / h)
         new_w = int(w * ratio)
         new_h = int(h * ratio)
@@ -494,9 +522,18 @@ class SettingsWindow:
                         use_icon = icon_ico
                     except Exception:
                         use_icon = None
+                # Precompile default frames into one pack instead of bundling the raw PNGs
+                from frame_pack import build_pack
+                pack_path = os.path.join(proj_dir, "build", "default_frames.xlpk")
+                os.makedirs(os.path.dirname(pack_path), exist_ok=True)
+                sizes = [int(x) for x in os.getenv("PACK_SIZES", "96,128,160,256").split(",") if x.strip()]
+                def pack_progress(done, total):
+                    self.top.after(0, lambda: self.pack_status.set(f"正在预编译帧包… {done}/{total}"))
+                build_pack(os.path.join(proj_dir, "default_frames"), pack_path, sizes, progress=pack_progress)
+                self.top.after(0, lambda: self.pack_status.set("正在打包…"))
                 cmd = [sys.executable, "-m", "PyInstaller", "-F", "-w", "-n", spec_name,
                        "--hidden-import", "cv2", "--hidden-import", "numpy",
-                       "--add-data", f"{os.path.join(proj_dir,'default_frames')};default_frames"]
+                       "--add-data", f"{pack_path};."]
                 if use_icon:
                     cmd += ["-i", use_icon]
                 cmd.append(app_py)
@@ -519,7 +556,8 @@ class SettingsWindow:
                     msg += "，已应用内置图标"
                 self.top.after(0, lambda: self.pack_status.set(msg))
             except Exception as e:
-                self.top.after(0, lambda: self.pack_status.set(f"打包失败：{e}"))
+                msg = f"打包失败：{e}"
+                self.top.after(0, lambda: self.pack_status.set(msg))
         threading.Thread(target=work, daemon=True).start()
 
     def _pick_wm_img_src(self):
@@ -533,7 +571,7 @@ class SettingsWindow:
             self.wm_img_dst.set(d)
 
     def _run_wm_images(self):
-        from tools_bg_remove import batch_remove_watermark_images
+        from tools_bg_remove import start_remove_watermark_images
         src = self.wm_img_src.get().strip()
         dst = self.wm_img_dst.get().strip()
         try:
@@ -547,9 +585,19 @@ class SettingsWindow:
             return
         self.wm_img_status.set("处理中…")
         import threading
+        def done(job):
+            state = "已取消" if job.cancelled else "完成"
+            self._post(lambda: self.wm_img_status.set(f"{state}：{job.ok} 成功，{job.fail} 失败，保存到 {dst}"))
         def work():
-            ok, fail = batch_remove_watermark_images(src, dst, limit=limit, recursive=True, strength=strength)
-            self.top.after(0, lambda: self.wm_img_status.set(f"完成：{ok} 成功，{fail} 失败，保存到 {dst}"))
+            try:
+                self._wm_job = start_remove_watermark_images(
+                    src, dst, limit=limit, recursive=True, strength=strength,
+                    on_progress=lambda job, p, err: self._post(lambda: self.wm_img_status.set(self._job_text(job))),
+                    on_done=done,
+                )
+            except Exception as e:
+                msg = f"处理出错: {e}"
+                self._post(lambda: self.wm_img_status.set(msg))
         threading.Thread(target=work, daemon=True).start()
 
     def _pick_wm_vid_src(self):
@@ -580,7 +628,50 @@ class SettingsWindow:
         out = os.path.join(outdir, name)
         self.wm_vid_status.set("处理中…")
         import threading
+        def progress(st):
+            self._post(lambda: self.wm_vid_status.set(f"处理中：{st['frames']} 帧，{st['fps']:.1f} 帧/秒"))
         def work():
-            ok = remove_watermark_video_file(src, out, mode=mode, strength=strength)
-            self.top.after(0, lambda: self.wm_vid_status.set("完成：" + (out if ok else "失败")))
+            try:
+                ok = remove_watermark_video_file(src, out, mode=mode, strength=strength, progress=progress)
+            except Exception as e:
+                msg = f"处理出错: {e}"
+                self._post(lambda: self.wm_vid_status.set(msg))
+                return
+            self._post(lambda: self.wm_vid_status.set("完成：" + (out if ok else "失败")))
+        threading.Thread(target=work, daemon=True).start()
+
+    def _pick_vid_imp_src(self):
+        p = filedialog.askopenfilename(filetypes=[("视频", ".mp4 .mov .avi .mkv")])
+        if p:
+            self.vid_imp_src.set(p)
+
+    def _pick_vid_imp_dst(self):
+        d = filedialog.askdirectory()
+        if d:
+            self.vid_imp_dst.set(d)
+
+    def _run_vid_import(self):
+        from tools_bg_remove import import_video_frames
+        src = self.vid_imp_src.get().strip()
+        dst = self.vid_imp_dst.get().strip()
+        try:
+            fps = float(self.vid_imp_fps.get().strip() or "12")
+            size = int(self.vid_imp_size.get().strip() or "128")
+            bg = int(self.batch_bg.get().strip() or "30")
+            alpha = int(self.batch_alpha.get().strip() or "24")
+        except Exception:
+            self.vid_imp_status.set("参数错误")
+            return
+        if not src or not dst:
+            self.vid_imp_status.set("请选择源视频与保存目录")
+            return
+        self.vid_imp_status.set("导入中…")
+        import threading
+        def work():
+            try:
+                n = import_video_frames(src, dst, fps=fps, size=size, bg_threshold=bg, alpha_threshold=alpha)
+                self.top.after(0, lambda: self.vid_imp_status.set(f"完成：{n} 帧，保存到 {dst}"))
+            except Exception as e:
+                msg = f"导入失败：{e}"
+                self.top.after(0, lambda: self.vid_imp_status.set(msg))
         threading.Thread(target=work, daemon=True).start()
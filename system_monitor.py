@@ -1,8 +1,19 @@
 import time
+import ctypes
+from typing import Optional
 try:
     import psutil  # type: ignore
 except Exception:
     psutil = None
+try:
+    from ctypes import wintypes
+    _user32 = ctypes.windll.user32  # type: ignore[attr-defined]
+    _user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+    _user32.GetAncestor.restype = wintypes.HWND
+    _user32.GetWindow.argtypes = [wintypes.HWND, wintypes.UINT]
+    _user32.GetWindow.restype = wintypes.HWND
+except Exception:
+    _user32 = None
 
 def get_system_status():
     tm = time.localtime()
@@ -21,8 +32,83 @@ def get_system_status():
         "cpu_high": cpu >= 75,
     }
 
+_proc = None
+
+
+def get_cpu_load():
+    # 非阻塞：返回自上次调用以来的 (整机 CPU%, 本进程折算到整机的 CPU%)，无 psutil 时返回 None
+    global _proc
+    if not psutil:
+        return None
+    try:
+        if _proc is None:
+            _proc = psutil.Process()
+        total = psutil.cpu_percent(interval=None)
+        own = _proc.cpu_percent(interval=None) / (psutil.cpu_count() or 1)
+        return total, own
+    except Exception:
+        return None
+
 def get_user_activity():
     # 占位：简单认为最近有按键
     return {
         "last_keypress": "刚刚",
     }
+
+
+class _LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+
+def get_idle_seconds() -> Optional[float]:
+    # 距离最后一次键鼠输入的秒数；非 Windows 无法可靠获取，返回 None
+    if _user32 is None:
+        return None
+    try:
+        info = _LASTINPUTINFO()
+        info.cbSize = ctypes.sizeof(info)
+        if not _user32.GetLastInputInfo(ctypes.byref(info)):
+            return None
+        return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000.0
+    except Exception:
+        return None
+
+
+def _cloaked(hwnd) -> bool:
+    # UWP 挂起的窗口"可见"但不会绘制，不能算作遮挡
+    try:
+        value = ctypes.c_int(0)
+        ctypes.windll.dwmapi.DwmGetWindowAttribute(hwnd, 14, ctypes.byref(value), ctypes.sizeof(value))
+        return value.value != 0
+    except Exception:
+        return False
+
+
+def is_window_covered(hwnd) -> bool:
+    # 沿 Z 序向上查找：有可见窗口完整盖住本窗口即视为被完全遮挡；非 Windows 一律返回 False
+    if _user32 is None or not hwnd:
+        return False
+    try:
+        top = _user32.GetAncestor(hwnd, 2)
+        rect = wintypes.RECT()
+        if not top or not _user32.GetWindowRect(top, ctypes.byref(rect)):
+            return False
+        other = wintypes.RECT()
+        h = _user32.GetWindow(top, 3)
+        while h:
+            if (
+                _user32.IsWindowVisible(h)
+                and not _user32.IsIconic(h)
+                and not (_user32.GetWindowLongW(h, -20) & 0x20)
+                and not _cloaked(h)
+                and _user32.GetWindowRect(h, ctypes.byref(other))
+                and other.left <= rect.left
+                and other.top <= rect.top
+                and other.right >= rect.right
+                and other.bottom >= rect.bottom
+            ):
+                return True
+            h = _user32.GetWindow(h, 3)
+    except Exception:
+        return False
+    return False
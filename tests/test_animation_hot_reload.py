@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import animation_player as ap  # noqa: E402
+from frame_cache import FrameCache  # noqa: E402
+
+
+class FakePhoto:
+    # 代替 ImageTk.PhotoImage：不需要 Tk，只记录当前内容
+    def __init__(self, img=None, **kw):
+        self.img = img
+
+    def paste(self, img):
+        self.img = img
+
+
+class FakeRoot:
+    # 代替 Tk 根窗口：after 回调按到期时间在 run() 中依次执行
+    def __init__(self):
+        self._queue = []
+        self._seq = 0
+        self._cancelled = set()
+
+    def after(self, ms, fn, *args):
+        self._seq += 1
+        self._queue.append((time.monotonic() + ms / 1000.0, self._seq, fn, args))
+        return str(self._seq)
+
+    def after_cancel(self, ident):
+        self._cancelled.add(ident)
+
+    def run_until(self, cond, timeout=10.0):
+        end = time.monotonic() + timeout
+        while time.monotonic() < end and not cond():
+            if not self._queue:
+                time.sleep(0.01)
+                continue
+            self._queue.sort()
+            due, seq, fn, args = self._queue[0]
+            if due > time.monotonic():
+                time.sleep(min(0.01, due - time.monotonic()))
+                continue
+            self._queue.pop(0)
+            if str(seq) not in self._cancelled:
+                fn(*args)
+        return cond()
+
+
+class FakeLabel:
+    def configure(self, **kw):
+        pass
+
+
+@pytest.fixture
+def frames_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ap.ImageTk, "PhotoImage", FakePhoto)
+    monkeypatch.setenv("ANIMATION_WATCH_SECONDS", "0.05")
+    monkeypatch.setenv("ANIMATION_TWEEN", "0")
+    d = tmp_path / "frames"
+    d.mkdir()
+    for i in range(6):
+        img = Image.new("RGB", (64, 64), (250, 250, 250))
+        ImageDraw.Draw(img).rectangle((8 + i * 6, 20, 30 + i * 6, 44), fill=(200, 40, 40))
+        img.save(d / f"frame_{i + 1}.png")
+    return d
+
+
+def _player(frames_dir, cache_root):
+    root = FakeRoot()
+    player = ap.AnimationPlayer(root, FakeLabel(), str(frames_dir), fps=12, autoload=False)
+    player._cache = FrameCache(str(cache_root), max_bytes=64 * 1024 * 1024)
+    player.configure(pet_size=64, use_transparent=False)
+    assert root.run_until(lambda: _settled(player))
+    return root, player
+
+
+def _settled(player):
+    return (
+        len(player._frames) == 6
+        and player._load_done >= player._load_total
+        and not player._drafts
+        and player._hot_order is None
+    )
+
+
+def _transparent_pixels(player):
+    return [int((np.asarray(p.img)[..., 3] == 0).sum()) for p in player._frames]
+
+
+def test_toggle_survives_hot_reload_after_warm_start(frames_dir, tmp_path):
+    cache_root = tmp_path / "cache"
+    cache_root.mkdir()
+    _player(frames_dir, cache_root)
+    root, player = _player(frames_dir, cache_root)
+    assert all(layer[1] is None for layer in player._layers)
+
+    assert player.configure(use_transparent=True) is False
+    assert all(n > 0 for n in _transparent_pixels(player))
+
+    # 修改一个文件触发热重载，其余文件复用已有结果，透明设置不能丢
+    path = frames_dir / "frame_2.png"
+    img = Image.open(path).convert("RGB")
+    ImageDraw.Draw(img).rectangle((28, 50, 36, 56), fill=(0, 0, 255))
+    img.save(path)
+    os.utime(path, None)
+    old = player._frames
+    assert root.run_until(lambda: player._frames is not old and _settled(player))
+    counts = _transparent_pixels(player)
+    assert len(counts) == 6
+    assert all(n > 0 for n in counts)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bg_keying import analyze, compose, key_frame, key_frame_pixels  # noqa: E402
+
+
+def _frame(seed: int, transparent: bool) -> Image.Image:
+    # 随机噪声主体 + 近似纯色背景；transparent 时四角 alpha 为 0，模拟已抠图素材
+    rng = np.random.default_rng(seed)
+    arr = np.empty((24, 32, 4), dtype=np.uint8)
+    arr[..., :3] = 240 + rng.integers(-12, 12, (24, 32, 3))
+    arr[..., 3] = rng.integers(0, 256, (24, 32))
+    arr[6:18, 8:24, :3] = rng.integers(0, 256, (12, 16, 3))
+    if transparent:
+        arr[:3, :3, 3] = arr[:3, -3:, 3] = arr[-3:, :3, 3] = arr[-3:, -3:, 3] = 0
+    else:
+        arr[..., 3] = np.maximum(arr[..., 3], 16)
+        arr[:3, :3, 3] = arr[:3, -3:, 3] = arr[-3:, :3, 3] = arr[-3:, -3:, 3] = 255
+    return Image.fromarray(arr, "RGBA")
+
+
+CASES = [
+    (seed, transparent, use_transparent, bg, alpha, fill)
+    for seed in range(3)
+    for transparent in (False, True)
+    for use_transparent in (False, True)
+    for bg, alpha in ((0, 0), (30, 24), (90, 200))
+    for fill in ("#f4f4f4", "#102030")
+]
+
+
+@pytest.mark.parametrize("seed,transparent,use_transparent,bg,alpha,fill", CASES)
+def test_vectorized_matches_pixel_reference(seed, transparent, use_transparent, bg, alpha, fill):
+    img = _frame(seed, transparent)
+    expected = np.asarray(key_frame_pixels(img.copy(), bg, alpha, use_transparent, fill))
+
+    assert np.array_equal(np.asarray(key_frame(img.copy(), bg, alpha, use_transparent, fill)), expected)
+
+    arr = np.asarray(img)
+    mask, key_rgb, prekeyed = analyze(arr, bg)
+    assert np.array_equal(compose(arr, mask, key_rgb, prekeyed, use_transparent, alpha, fill), expected)
@@ -0,0 +1,88 @@
+import os
+import sys
+from collections import deque
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bg_keying import border, flood_fill, near_white, remove_background, remove_background_pixels  # noqa: E402
+
+
+def _image(seed: int, prekeyed: bool) -> Image.Image:
+    # 近白背景 + 随机色块/细对角线（考验 8 邻接的对角游程）+ 随机 alpha
+    rng = np.random.default_rng(seed)
+    h, w = int(rng.integers(8, 40)), int(rng.integers(8, 40))
+    arr = np.empty((h, w, 4), dtype=np.uint8)
+    arr[..., :3] = 255 - rng.integers(0, 40, (h, w, 3))
+    arr[..., 3] = rng.choice([0, 10, 30, 255], (h, w), p=[0.1, 0.05, 0.05, 0.8])
+    for _ in range(int(rng.integers(1, 6))):
+        y, x = int(rng.integers(0, h)), int(rng.integers(0, w))
+        arr[y:y + int(rng.integers(1, 10)), x:x + int(rng.integers(1, 10)), :3] = rng.integers(0, 200, 3)
+    for i in range(min(h, w)):
+        if rng.random() < 0.5:
+            arr[i, (i + seed) % w, :3] = 20
+    if prekeyed:
+        for y, x in [(0, 0), (0, w - 1), (h - 1, 0), (h - 1, w - 1)]:
+            arr[y, x, 3] = 0
+    else:
+        for y, x in [(0, 0), (0, w - 1), (h - 1, 0), (h - 1, w - 1)]:
+            arr[y, x, 3] = 255
+    return Image.fromarray(arr, "RGBA")
+
+
+CASES = [
+    (seed, prekeyed, bg, shrink)
+    for seed in range(25)
+    for prekeyed in (False, True)
+    for bg in (10, 30, 60)
+    for shrink in (0, 1, 2)
+]
+
+
+@pytest.mark.parametrize("seed,prekeyed,bg,shrink", CASES)
+def test_remove_background_matches_pixel_reference(seed, prekeyed, bg, shrink):
+    img = _image(seed, prekeyed)
+    expected = np.asarray(remove_background_pixels(img.copy(), bg, 24, shrink))
+    assert np.array_equal(remove_background(np.asarray(img), bg, 24, shrink), expected)
+
+
+def _bfs(candidate, seeds):
+    # 参考：8 邻接 deque 泛洪，种子本身总在结果中，只向 candidate 扩展
+    h, w = candidate.shape
+    mask = seeds.copy()
+    q = deque(zip(*np.nonzero(seeds)))
+    while q:
+        y, x = q.popleft()
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                ny, nx = y + dy, x + dx
+                if 0 <= ny < h and 0 <= nx < w and not mask[ny, nx] and candidate[ny, nx]:
+                    mask[ny, nx] = True
+                    q.append((ny, nx))
+    return mask
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_flood_fill_matches_bfs_with_arbitrary_seeds(seed):
+    # 种子可以落在 candidate 之外（如图标处理中只按颜色、不按 alpha 取边缘种子）
+    rng = np.random.default_rng(1000 + seed)
+    h, w = int(rng.integers(1, 30)), int(rng.integers(1, 30))
+    candidate = rng.random((h, w)) < rng.uniform(0.2, 0.8)
+    seeds = rng.random((h, w)) < 0.05
+    assert np.array_equal(flood_fill(candidate, seeds), _bfs(candidate, seeds))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_icon_style_alpha_gated_fill(seed):
+    rng = np.random.default_rng(2000 + seed)
+    h, w = int(rng.integers(4, 30)), int(rng.integers(4, 30))
+    arr = np.empty((h, w, 4), dtype=np.uint8)
+    arr[..., :3] = 255 - rng.integers(0, 60, (h, w, 3))
+    arr[..., 3] = rng.choice([0, 255], (h, w), p=[0.3, 0.7])
+    white = near_white(arr, 30)
+    seeds = white & border(h, w)
+    candidate = white & (arr[..., 3] > 16)
+    assert np.array_equal(flood_fill(candidate, seeds), _bfs(candidate, seeds))
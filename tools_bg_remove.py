@@ -1,10 +1,18 @@
 import os
+import json
+import time
+import shutil
+import queue
 import threading
 import sys
 import subprocess
-from typing import Tuple, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional, Tuple
 from PIL import Image
 import numpy as np
+from bg_keying import remove_background
 
 def _parse_hex(s: str) -> Tuple[int, int, int]:
     s = s.strip().lstrip('#')
@@ -13,128 +21,193 @@ def _parse_hex(s: str) -> Tuple[int, int, int]:
     return 244, 244, 244
 
 def _to_transparent(img: Image.Image, bg_threshold: int, alpha_threshold: int, edge_shrink: int = 1) -> Image.Image:
-    px = img.load()
-    w, h = img.size
-    # 检查角点是否透明
-    ca = [px[0, 0][3], px[w - 1, 0][3], px[0, h - 1][3], px[w - 1, h - 1][3]]
-
-    from collections import deque
-    mask = [[False] * w for _ in range(h)]
-
-    def near_white(r: int, g: int, b: int) -> bool:
-        return (255 - (r + g + b) // 3) <= bg_threshold
-
-    if sum(ca) / 4 < 10:
-        # 角落已透明：改为从整条边缘扫描近白区域作为种子点进行泛洪
-        seeds = []
-        for x in range(w):
-            r, g, b, a = px[x, 0]
-            if a > alpha_threshold and near_white(r, g, b):
-                seeds.append((x, 0))
-            r, g, b, a = px[x, h - 1]
-            if a > alpha_threshold and near_white(r, g, b):
-                seeds.append((x, h - 1))
-        for y in range(h):
-            r, g, b, a = px[0, y]
-            if a > alpha_threshold and near_white(r, g, b):
-                seeds.append((0, y))
-            r, g, b, a = px[w - 1, y]
-            if a > alpha_threshold and near_white(r, g, b):
-                seeds.append((w - 1, y))
-        q = deque(seeds)
-        for sx, sy in seeds:
-            mask[sy][sx] = True
-        dirs = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]
-        while q:
-            x, y = q.popleft()
-            for dx, dy in dirs:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < w and 0 <= ny < h and not mask[ny][nx]:
-                    r1, g1, b1, a1 = px[nx, ny]
-                    if a1 > alpha_threshold and near_white(r1, g1, b1):
-                        mask[ny][nx] = True
-                        q.append((nx, ny))
-    else:
-        # 角落不透明：使用角落平均色作为背景参考
-        corners = [px[0, 0], px[w - 1, 0], px[0, h - 1], px[w - 1, h - 1]]
-        br = int(sum([c[0] for c in corners]) / 4)
-        bg = int(sum([c[1] for c in corners]) / 4)
-        bb = int(sum([c[2] for c in corners]) / 4)
-        def near_bg(r, g, b):
-            return (abs(r - br) + abs(g - bg) + abs(b - bb)) // 3 <= bg_threshold
-        seeds = [(0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1)]
-        q = deque([])
-        for sx, sy in seeds:
-            r0, g0, b0, _ = px[sx, sy]
-            if near_bg(r0, g0, b0):
-                mask[sy][sx] = True
-                q.append((sx, sy))
-        dirs = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]
-        while q:
-            x, y = q.popleft()
-            for dx, dy in dirs:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < w and 0 <= ny < h and not mask[ny][nx]:
-                    r1, g1, b1, _ = px[nx, ny]
-                    if near_bg(r1, g1, b1):
-                        mask[ny][nx] = True
-                        q.append((nx, ny))
-
-    # 边缘收缩，减少白边
-    for _ in range(max(0, int(edge_shrink))):
-        shrink = [[mask[y][x] for x in range(w)] for y in range(h)]
-        for y in range(h):
-            for x in range(w):
-                if not mask[y][x]:
-                    continue
-                for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < w and 0 <= ny < h and not mask[ny][nx]:
-                        shrink[y][x] = False
-                        break
-        mask = shrink
-
-    # 应用mask：仅修改alpha，不改动RGB，保留主体颜色
-    for y in range(h):
-        for x in range(w):
-            r0, g0, b0, a0 = px[x, y]
-            if mask[y][x]:
-                px[x, y] = (r0, g0, b0, 0)
-            else:
-                px[x, y] = (r0, g0, b0, 0 if a0 <= alpha_threshold else 255)
+    # 角点已透明时从整条边缘的近白像素泛洪，否则以四角均色为背景从四角泛洪；
+    # 之后按 edge_shrink 收缩边缘减少白边，只改 alpha，保留主体颜色
+    out = remove_background(np.asarray(img.convert("RGBA")), bg_threshold, alpha_threshold, edge_shrink)
+    img.paste(Image.fromarray(out, "RGBA"))
     return img
 
-def batch_remove_white_bg(src_dir: str, dst_dir: str, limit: int = 300, bg_threshold: int = 30, alpha_threshold: int = 24, recursive: bool = True, edge_shrink: int = 1) -> Tuple[int, int]:
-    if not os.path.isdir(src_dir):
-        return 0, 0
-    os.makedirs(dst_dir, exist_ok=True)
+def _list_images(src_dir: str, recursive: bool, exts, limit: int) -> List[str]:
     paths: List[str] = []
     if recursive:
         for r, _, files in os.walk(src_dir):
             for f in files:
-                ext = os.path.splitext(f)[1].lower()
-                if ext in {'.png', '.jpg', '.jpeg', '.webp', '.gif'}:
+                if os.path.splitext(f)[1].lower() in exts:
                     paths.append(os.path.join(r, f))
     else:
         for f in os.listdir(src_dir):
             fp = os.path.join(src_dir, f)
-            ext = os.path.splitext(fp)[1].lower()
-            if os.path.isfile(fp) and ext in {'.png', '.jpg', '.jpeg', '.webp', '.gif'}:
+            if os.path.isfile(fp) and os.path.splitext(fp)[1].lower() in exts:
                 paths.append(fp)
-    paths = paths[:limit]
-    ok = 0
-    fail = 0
-    for p in paths:
-        try:
-            img = Image.open(p).convert('RGBA')
-            img = _to_transparent(img, bg_threshold, alpha_threshold, edge_shrink=edge_shrink)
-            name = os.path.splitext(os.path.basename(p))[0] + '.png'
-            out = os.path.join(dst_dir, name)
-            img.save(out, format='PNG')
-            ok += 1
-        except Exception:
-            fail += 1
-    return ok, fail
+    return paths[:limit]
+
+
+class ToolJob:
+    # 一个批处理任务：每处理完一个文件回调 on_progress(job, path, error)，结束时回调 on_done(job)。
+    # 回调在后台线程中执行，界面需自行用 after 转回主线程
+    def __init__(self, name: str, fn: Callable, items: List[tuple], on_progress: Optional[Callable] = None, on_done: Optional[Callable] = None):
+        self.name = name
+        self.fn = fn
+        self.total = len(items)
+        self.done = 0
+        self.ok = 0
+        self.fail = 0
+        self.errors: List[Tuple[str, str]] = []
+        self.cancelled = False
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.finished = threading.Event()
+        self._pending = deque(items)
+        self._inflight = 0
+        self._engine: Optional["JobEngine"] = None
+
+    def cancel(self):
+        # 尚未开始的文件直接丢弃，已在子进程中处理的文件等它完成
+        if self._engine is not None:
+            self._engine.cancel(self)
+        else:
+            self.cancelled = True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.finished.wait(timeout)
+
+
+class JobEngine:
+    # 全局一个按 CPU 核数设定的进程池；多个任务按提交顺序排队共享，
+    # 同一时刻在途的文件数不超过进程数，不会超额占用核心
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(1, int(workers or os.getenv("TOOL_WORKERS", "0") or 0) or (os.cpu_count() or 1))
+        self._pool = None
+        self._jobs: deque = deque()
+        self._slots = threading.Semaphore(self.workers)
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="tool-jobs", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: ToolJob) -> ToolJob:
+        job._engine = self
+        if not job.total:
+            self._finish(job)
+            return job
+        with self._cond:
+            self._jobs.append(job)
+            self._cond.notify()
+        return job
+
+    def cancel(self, job: ToolJob):
+        with self._cond:
+            job.cancelled = True
+            job._pending.clear()
+            if job in self._jobs:
+                self._jobs.remove(job)
+            idle = not job._inflight
+        if idle:
+            self._finish(job)
+
+    def _next_item(self):
+        # 调用方持有 _cond：取队首任务的下一个文件；已取消的任务清空剩余文件
+        if not self._jobs:
+            return None
+        job = self._jobs[0]
+        job._inflight += 1
+        item = job._pending.popleft()
+        if not job._pending:
+            self._jobs.popleft()
+        return job, item
+
+    def _run(self):
+        while True:
+            self._slots.acquire()
+            with self._cond:
+                nxt = self._next_item()
+                while nxt is None:
+                    self._cond.wait()
+                    nxt = self._next_item()
+            job, item = nxt
+            try:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                fut = self._pool.submit(job.fn, *item)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._pool = None
+                self._done(job, item, None, e)
+                continue
+            fut.add_done_callback(lambda f, job=job, item=item: self._done(job, item, f, None))
+
+    def _done(self, job: ToolJob, item: tuple, fut, error):
+        self._slots.release()
+        if error is None:
+            try:
+                fut.result()
+            except BrokenProcessPool as e:
+                # 子进程异常退出后进程池不可再用，下一个文件提交时重建
+                self._pool = None
+                error = e
+            except Exception as e:
+                error = e
+        with self._cond:
+            job._inflight -= 1
+            job.done += 1
+            if error is None:
+                job.ok += 1
+            else:
+                job.fail += 1
+                job.errors.append((item[0], str(error) or type(error).__name__))
+            last = not job._inflight and (not job._pending or job.cancelled) and job not in self._jobs
+        if job.on_progress:
+            try:
+                job.on_progress(job, item[0], error)
+            except Exception:
+                pass
+        if last:
+            self._finish(job)
+
+    def _finish(self, job: ToolJob):
+        if job.finished.is_set():
+            return
+        job.finished.set()
+        if job.on_done:
+            try:
+                job.on_done(job)
+            except Exception:
+                pass
+
+
+_engine: Optional[JobEngine] = None
+_engine_lock = threading.Lock()
+
+
+def job_engine() -> JobEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = JobEngine()
+        return _engine
+
+
+def _remove_white_bg_file(p: str, dst_dir: str, bg_threshold: int, alpha_threshold: int, edge_shrink: int) -> str:
+    img = Image.open(p).convert('RGBA')
+    img = _to_transparent(img, bg_threshold, alpha_threshold, edge_shrink=edge_shrink)
+    name = os.path.splitext(os.path.basename(p))[0] + '.png'
+    out = os.path.join(dst_dir, name)
+    img.save(out, format='PNG')
+    return out
+
+
+def start_remove_white_bg(src_dir: str, dst_dir: str, limit: int = 300, bg_threshold: int = 30, alpha_threshold: int = 24, recursive: bool = True, edge_shrink: int = 1, on_progress=None, on_done=None) -> ToolJob:
+    paths: List[str] = []
+    if os.path.isdir(src_dir):
+        os.makedirs(dst_dir, exist_ok=True)
+        paths = _list_images(src_dir, recursive, {'.png', '.jpg', '.jpeg', '.webp', '.gif'}, limit)
+    items = [(p, dst_dir, bg_threshold, alpha_threshold, edge_shrink) for p in paths]
+    return job_engine().submit(ToolJob("去白底", _remove_white_bg_file, items, on_progress, on_done))
+
+
+def batch_remove_white_bg(src_dir: str, dst_dir: str, limit: int = 300, bg_threshold: int = 30, alpha_threshold: int = 24, recursive: bool = True, edge_shrink: int = 1) -> Tuple[int, int]:
+    job = start_remove_white_bg(src_dir, dst_dir, limit, bg_threshold, alpha_threshold, recursive, edge_shrink)
+    job.wait()
+    return job.ok, job.fail
 
 def _ensure_cv2():
     try:
@@ -149,108 +222,496 @@ def _ensure_cv2():
             raise
 
 def _detect_wm_mask_bgr(bgr: np.ndarray, strength: int = 1) -> np.ndarray:
+    # 水印只在边缘带内检测：四条带各自向内多取 2*strength 像素再做闭运算，
+    # 带内结果与整帧计算完全一致，开销只与边缘带面积有关
     cv2 = _ensure_cv2()
-    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
-    s = hsv[...,1]
-    v = hsv[...,2]
-    m = ((s < 40) & (v > 200)).astype(np.uint8) * 255
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2*strength+1, 2*strength+1))
-    m = cv2.morphologyEx(m, cv2.MORPH_CLOSE, kernel)
-    h, w = m.shape
-    border = np.zeros_like(m)
+    h, w = bgr.shape[:2]
     bw = max(10, min(h,w)//20)
-    border[:bw,:] = 255; border[-bw:,:] = 255; border[:, :bw] = 255; border[:, -bw:] = 255
-    m &= border
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2*strength+1, 2*strength+1))
+
+    def detect(y0, y1, x0, x1):
+        hsv = cv2.cvtColor(np.ascontiguousarray(bgr[y0:y1, x0:x1]), cv2.COLOR_BGR2HSV)
+        m = ((hsv[...,1] < 40) & (hsv[...,2] > 200)).astype(np.uint8) * 255
+        return cv2.morphologyEx(m, cv2.MORPH_CLOSE, kernel)
+
+    ext = bw + 2*strength
+    if 2*ext >= min(h, w):
+        m = detect(0, h, 0, w)
+        border = np.zeros_like(m)
+        border[:bw,:] = 255; border[-bw:,:] = 255; border[:, :bw] = 255; border[:, -bw:] = 255
+        m &= border
+        return m
+    m = np.zeros((h, w), dtype=np.uint8)
+    m[:bw, :] = detect(0, ext, 0, w)[:bw]
+    m[-bw:, :] = detect(h-ext, h, 0, w)[-bw:]
+    m[:, :bw] = detect(0, h, 0, ext)[:, :bw]
+    m[:, -bw:] = detect(0, h, w-ext, w)[:, -bw:]
     return m
 
-def _inpaint_bgr(bgr: np.ndarray, mask: np.ndarray, radius: int = 3) -> np.ndarray:
+def _mask_rois(mask: np.ndarray, radius: int) -> List[Tuple[int, int, int, int]]:
+    # 掩码各连通块的包围框向外扩 radius+2（修复时参考的邻域），相交的框合并，
+    # 每个框内都包含完整的连通块及其全部参考像素
     cv2 = _ensure_cv2()
-    return cv2.inpaint(bgr, mask, radius, cv2.INPAINT_TELEA)
+    h, w = mask.shape[:2]
+    pad = radius + 2
+    # 先取整体包围框（很快），连通块只在框内统计
+    bx, by, bw, bh = cv2.boundingRect(mask)
+    if not bw or not bh:
+        return []
+    n, _, stats, _ = cv2.connectedComponentsWithStats(np.ascontiguousarray(mask[by:by+bh, bx:bx+bw]), connectivity=8)
+    boxes = []
+    for i in range(1, n):
+        x, y, cw, ch = (int(v) for v in stats[i, :4])
+        x += bx
+        y += by
+        boxes.append([max(0, x-pad), max(0, y-pad), min(w, x+cw+pad), min(h, y+ch+pad)])
+    merged = True
+    while merged:
+        merged = False
+        boxes.sort()
+        out = []
+        for b in boxes:
+            for o in out:
+                if b[0] < o[2] and o[0] < b[2] and b[1] < o[3] and o[1] < b[3]:
+                    o[0], o[1] = min(o[0], b[0]), min(o[1], b[1])
+                    o[2], o[3] = max(o[2], b[2]), max(o[3], b[3])
+                    merged = True
+                    break
+            else:
+                out.append(b)
+        boxes = out
+    return [tuple(b) for b in boxes]
 
-def batch_remove_watermark_images(src_dir: str, dst_dir: str, limit: int = 300, recursive: bool = True, strength: int = 1) -> Tuple[int, int]:
+def _inpaint_bgr(bgr: np.ndarray, mask: np.ndarray, radius: int = 3, rois: Optional[List[Tuple[int, int, int, int]]] = None) -> np.ndarray:
+    # 只在掩码连通块的扩展包围框内修复再贴回，耗时与水印面积相关而不是整帧大小；
+    # 同一掩码反复使用时可传入预先算好的 rois
     cv2 = _ensure_cv2()
-    if not os.path.isdir(src_dir):
-        return 0, 0
-    os.makedirs(dst_dir, exist_ok=True)
-    paths: List[str] = []
-    exts = {'.png', '.jpg', '.jpeg', '.webp'}
-    if recursive:
-        for r, _, files in os.walk(src_dir):
-            for f in files:
-                if os.path.splitext(f)[1].lower() in exts:
-                    paths.append(os.path.join(r, f))
+    if rois is None:
+        rois = _mask_rois(mask, radius)
+    out = bgr.copy()
+    for x0, y0, x1, y1 in rois:
+        out[y0:y1, x0:x1] = cv2.inpaint(np.ascontiguousarray(bgr[y0:y1, x0:x1]), np.ascontiguousarray(mask[y0:y1, x0:x1]), radius, cv2.INPAINT_TELEA)
+    return out
+
+def _remove_watermark_file(p: str, dst_dir: str, strength: int) -> str:
+    cv2 = _ensure_cv2()
+    img = cv2.imread(p, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise RuntimeError("read fail")
+    has_alpha = img.shape[2] == 4 if len(img.shape) == 3 else False
+    if has_alpha:
+        bgr = img[..., :3]
     else:
-        for f in os.listdir(src_dir):
-            fp = os.path.join(src_dir, f)
-            if os.path.isfile(fp) and os.path.splitext(fp)[1].lower() in exts:
-                paths.append(fp)
-    paths = paths[:limit]
-    ok = 0
-    fail = 0
-    for p in paths:
+        bgr = img
+    mask = _detect_wm_mask_bgr(bgr, strength=strength)
+    out_bgr = _inpaint_bgr(bgr, mask, radius=3+strength)
+    if has_alpha:
+        out = np.concatenate([out_bgr, img[...,3:4]], axis=2)
+    else:
+        out = out_bgr
+    name = os.path.splitext(os.path.basename(p))[0] + '.png'
+    out_path = os.path.join(dst_dir, name)
+    cv2.imwrite(out_path, out)
+    return out_path
+
+
+def start_remove_watermark_images(src_dir: str, dst_dir: str, limit: int = 300, recursive: bool = True, strength: int = 1, on_progress=None, on_done=None) -> ToolJob:
+    _ensure_cv2()
+    paths: List[str] = []
+    if os.path.isdir(src_dir):
+        os.makedirs(dst_dir, exist_ok=True)
+        paths = _list_images(src_dir, recursive, {'.png', '.jpg', '.jpeg', '.webp'}, limit)
+    items = [(p, dst_dir, strength) for p in paths]
+    return job_engine().submit(ToolJob("去水印", _remove_watermark_file, items, on_progress, on_done))
+
+
+def batch_remove_watermark_images(src_dir: str, dst_dir: str, limit: int = 300, recursive: bool = True, strength: int = 1) -> Tuple[int, int]:
+    job = start_remove_watermark_images(src_dir, dst_dir, limit, recursive, strength)
+    job.wait()
+    return job.ok, job.fail
+
+def _video_workers(workers: Optional[int] = None) -> int:
+    return max(1, int(workers or os.getenv("VIDEO_WORKERS", "0") or 0) or (os.cpu_count() or 1))
+
+def _matches_fixed(cur: np.ndarray, fixed_mask: np.ndarray) -> bool:
+    cv2 = _ensure_cv2()
+    return cv2.countNonZero(cv2.bitwise_xor(cur, fixed_mask)) < 0.1 * cv2.countNonZero(fixed_mask)
+
+def _sample_fixed_mask(cap, sample: int, strength: int) -> Optional[np.ndarray]:
+    # 前 sample 帧检测结果取并集，作为固定水印的掩码
+    cv2 = _ensure_cv2()
+    fixed_mask = None
+    count = 0
+    while count < sample:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        m = _detect_wm_mask_bgr(frame, strength=strength)
+        fixed_mask = m if fixed_mask is None else cv2.bitwise_or(fixed_mask, m)
+        count += 1
+    return fixed_mask
+
+def _frame_cleaner(mode: str, fixed_mask: Optional[np.ndarray], strength: int) -> Callable:
+    # fixed 模式复用固定掩码，逐帧完全不做检测，修复区域也只算一次；
+    # auto 模式仍逐帧检测（只在边缘带上，开销很小），与固定掩码不一致时改用当帧结果，
+    # 中途出现或移动的水印同样能去掉
+    radius = 3 + strength
+    if fixed_mask is None or mode == 'moving':
+        return lambda frame: _inpaint_bgr(frame, _detect_wm_mask_bgr(frame, strength=strength), radius)
+    rois = _mask_rois(fixed_mask, radius)
+    if mode == 'fixed':
+        return lambda frame: _inpaint_bgr(frame, fixed_mask, radius, rois)
+
+    def clean(frame):
+        cur = _detect_wm_mask_bgr(frame, strength=strength)
+        if _matches_fixed(cur, fixed_mask):
+            return _inpaint_bgr(frame, fixed_mask, radius, rois)
+        return _inpaint_bgr(frame, cur, radius)
+    return clean
+
+def _run_video_pipeline(cap, writer, fn: Callable, workers: int, progress: Optional[Callable[[dict], None]] = None) -> dict:
+    # 解码线程 → workers 个处理线程 → 当前线程按帧号顺序写出。
+    # OpenCV 的解码、修复、编码都会释放 GIL，各阶段可以真正并行；
+    # tickets 限制在途帧数（含乱序完成等待写出的帧），内存占用有上限
+    workers = max(1, int(workers))
+    tickets = threading.Semaphore(workers * 2)
+    todo: queue.Queue = queue.Queue()
+    done = {}
+    cond = threading.Condition()
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    timing = {"read": 0.0, "process": 0.0, "write": 0.0}
+    total: List[Optional[int]] = [None]
+
+    def fail(e):
+        errors.append(e)
+        stop.set()
+        with cond:
+            cond.notify_all()
+
+    def reader():
+        n = 0
         try:
-            img = cv2.imread(p, cv2.IMREAD_UNCHANGED)
-            if img is None:
-                raise RuntimeError("read fail")
-            has_alpha = img.shape[2] == 4 if len(img.shape) == 3 else False
-            if has_alpha:
-                bgr = img[..., :3]
-            else:
-                bgr = img
-            mask = _detect_wm_mask_bgr(bgr, strength=strength)
-            out_bgr = _inpaint_bgr(bgr, mask, radius=3+strength)
-            if has_alpha:
-                out = np.concatenate([out_bgr, img[...,3:4]], axis=2)
+            while not stop.is_set():
+                if not tickets.acquire(timeout=0.1):
+                    continue
+                t0 = time.perf_counter()
+                ret, frame = cap.read()
+                timing["read"] += time.perf_counter() - t0
+                if not ret:
+                    break
+                todo.put((n, frame))
+                n += 1
+        except Exception as e:
+            fail(e)
+        finally:
+            for _ in range(workers):
+                todo.put(None)
+            with cond:
+                total[0] = n
+                cond.notify_all()
+
+    def work():
+        spent = 0.0
+        try:
+            while True:
+                item = todo.get()
+                if item is None or stop.is_set():
+                    break
+                n, frame = item
+                t0 = time.perf_counter()
+                out = fn(frame)
+                spent += time.perf_counter() - t0
+                with cond:
+                    done[n] = out
+                    cond.notify_all()
+        except Exception as e:
+            fail(e)
+        finally:
+            with cond:
+                timing["process"] += spent
+
+    def stats(n: int) -> dict:
+        elapsed = max(1e-6, time.perf_counter() - start)
+        return {
+            "frames": n,
+            "seconds": elapsed,
+            "fps": n / elapsed,
+            "workers": workers,
+            "read_s": timing["read"],
+            "process_s": timing["process"],
+            "write_s": timing["write"],
+        }
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=reader, name="video-read", daemon=True)]
+    threads += [threading.Thread(target=work, name=f"video-work-{i}", daemon=True) for i in range(workers)]
+    for th in threads:
+        th.start()
+    n = 0
+    try:
+        while True:
+            with cond:
+                while n not in done and not stop.is_set() and (total[0] is None or n < total[0]):
+                    cond.wait()
+                if stop.is_set() or n not in done:
+                    break
+                out = done.pop(n)
+            t0 = time.perf_counter()
+            writer.write(out)
+            timing["write"] += time.perf_counter() - t0
+            tickets.release()
+            n += 1
+            if progress and n % 25 == 0:
+                progress(stats(n))
+    except Exception as e:
+        fail(e)
+    finally:
+        stop.set()
+        for th in threads:
+            th.join()
+    if errors:
+        raise errors[0]
+    result = stats(n)
+    if progress:
+        progress(result)
+    return result
+
+class _FrameRange:
+    # 只读出 count 帧的 VideoCapture 包装，供分段处理使用
+    def __init__(self, cap, count: int):
+        self.cap = cap
+        self.left = count
+
+    def read(self):
+        if self.left <= 0:
+            return False, None
+        self.left -= 1
+        return self.cap.read()
+
+def _video_keyframes(in_path: str) -> List[int]:
+    # 只读取压缩包数据不解码，返回关键帧的帧号；后端不支持时返回空列表
+    cv2 = _ensure_cv2()
+    cap = cv2.VideoCapture(in_path, cv2.CAP_FFMPEG)
+    keys: List[int] = []
+    try:
+        if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+            return []
+        n = 0
+        while cap.grab():
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                keys.append(n)
+            n += 1
+    except Exception:
+        return []
+    finally:
+        cap.release()
+    return keys
+
+def _plan_segments(total: int, per_segment: int, keys: List[int]) -> List[Tuple[int, int]]:
+    # 每段约 per_segment 帧，起点对齐到之后最近的关键帧，分段 seek 时无需从前一个关键帧解码
+    cuts = [0]
+    for k in keys or range(0, total, per_segment):
+        if k - cuts[-1] >= per_segment and k < total:
+            cuts.append(k)
+    cuts.append(total)
+    return [(cuts[i], cuts[i + 1]) for i in range(len(cuts) - 1)]
+
+def _clean_video_segment(part_path: str, in_path: str, start: int, end: int, mode: str, mask_path: str, strength: int, fourcc: str, fps: float, size: Tuple[int, int]) -> str:
+    # 在子进程中处理 [start, end) 帧；写到临时文件，完整写完才改名，中断后该段会重做
+    cv2 = _ensure_cv2()
+    fixed_mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE) if mask_path else None
+    cap = cv2.VideoCapture(in_path)
+    root, ext = os.path.splitext(part_path)
+    tmp = root + ".tmp" + ext
+    writer = cv2.VideoWriter(tmp, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    try:
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        st = _run_video_pipeline(_FrameRange(cap, end - start), writer, _frame_cleaner(mode, fixed_mask, strength), 1)
+    finally:
+        cap.release()
+        writer.release()
+    if st["frames"] != end - start:
+        raise RuntimeError(f"segment {start}-{end}: only {st['frames']} frames decoded")
+    os.replace(tmp, part_path)
+    return part_path
+
+def _concat_segments(parts: List[str], out_path: str, fps: float, size: Tuple[int, int], work: str):
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        lst = os.path.join(work, "concat.txt")
+        with open(lst, "w", encoding="utf-8") as f:
+            for p in parts:
+                f.write("file '" + p.replace("'", "'\\''") + "'\n")
+        subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", lst, "-c", "copy", out_path], check=True)
+        return
+    # 没有 ffmpeg 时分段为无损 FFV1，这里按顺序解码后统一编码一次，画质与不分段一致
+    cv2 = _ensure_cv2()
+    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    try:
+        for p in parts:
+            cap = cv2.VideoCapture(p)
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    writer.write(frame)
+            finally:
+                cap.release()
+    finally:
+        writer.release()
+
+def _remove_watermark_video_segmented(in_path: str, out_path: str, mode: str, sample: int, strength: int, segment_seconds: float, progress: Optional[Callable[[dict], None]] = None) -> bool:
+    # 分段多进程：按关键帧切成若干段，各段在进程池中用同一个固定掩码处理，最后按顺序拼接。
+    # 中间结果放在 <输出>.parts 目录，清单与源文件、参数一致时跳过已完成的段，可断点续跑
+    cv2 = _ensure_cv2()
+    cap = cv2.VideoCapture(in_path)
+    if not cap.isOpened():
+        return False
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    work = out_path + ".parts"
+    st = os.stat(in_path)
+    keys = _video_keyframes(in_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+    if keys and not total:
+        total = keys[-1] + 1
+    copy = bool(shutil.which("ffmpeg"))
+    manifest = {
+        "source": os.path.abspath(in_path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "mode": mode,
+        "sample": sample,
+        "strength": strength,
+        "codec": "mp4v" if copy else "FFV1",
+        "segments": _plan_segments(total, max(1, int(segment_seconds * fps)), keys),
+    }
+    manifest["segments"] = [list(seg) for seg in manifest["segments"]]
+    man_path = os.path.join(work, "manifest.json")
+    old = None
+    try:
+        with open(man_path, "r", encoding="utf-8") as f:
+            old = json.load(f)
+    except Exception:
+        pass
+    if old != manifest:
+        shutil.rmtree(work, ignore_errors=True)
+        os.makedirs(work, exist_ok=True)
+        with open(man_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+    mask_path = ""
+    if mode != 'moving':
+        mask_path = os.path.join(work, "mask.png")
+        if not os.path.exists(mask_path):
+            fixed_mask = _sample_fixed_mask(cap, sample, strength)
+            if fixed_mask is None:
+                mask_path = ""
             else:
-                out = out_bgr
-            name = os.path.splitext(os.path.basename(p))[0] + '.png'
-            out_path = os.path.join(dst_dir, name)
-            cv2.imwrite(out_path, out)
-            ok += 1
-        except Exception:
-            fail += 1
-    return ok, fail
+                cv2.imwrite(mask_path + ".tmp.png", fixed_mask)
+                os.replace(mask_path + ".tmp.png", mask_path)
+    cap.release()
+    ext = ".mp4" if copy else ".avi"
+    parts = [os.path.join(work, f"seg_{i:04d}{ext}") for i in range(len(manifest["segments"]))]
+    items = []
+    resumed = 0
+    for p, (a, b) in zip(parts, manifest["segments"]):
+        if os.path.exists(p):
+            resumed += b - a
+        else:
+            items.append((p, in_path, a, b, mode, mask_path, strength, manifest["codec"], fps, size))
+    t0 = time.perf_counter()
+    counted = [resumed]
+
+    def on_progress(job, item, error):
+        if error is None:
+            a, b = next(seg for p, seg in zip(parts, manifest["segments"]) if p == item)
+            counted[0] += b - a
+        if progress:
+            elapsed = max(1e-6, time.perf_counter() - t0)
+            progress({"frames": counted[0], "fps": (counted[0] - resumed) / elapsed, "seconds": elapsed, "segments": len(parts), "segments_done": len(parts) - len(items) + job.ok})
 
-def remove_watermark_video_file(in_path: str, out_path: str, mode: str = 'auto', sample: int = 50, strength: int = 1) -> bool:
+    job = job_engine().submit(ToolJob("视频分段", _clean_video_segment, items, on_progress))
+    job.wait()
+    if job.fail:
+        p, reason = job.errors[0]
+        raise RuntimeError(f"{job.fail} segment(s) failed, rerun to resume: {os.path.basename(p)}: {reason}")
+    _concat_segments(parts, out_path, fps, size, work)
+    shutil.rmtree(work, ignore_errors=True)
+    try:
+        elapsed = time.perf_counter() - t0
+        print(f"[video] {len(parts)} segments ({len(parts) - len(items)} resumed) {total} frames in {elapsed:.2f}s")
+    except Exception:
+        pass
+    return True
+
+def remove_watermark_video_file(in_path: str, out_path: str, mode: str = 'auto', sample: int = 50, strength: int = 1, workers: Optional[int] = None, progress: Optional[Callable[[dict], None]] = None, segment_seconds: Optional[float] = None) -> bool:
+    # progress(stats)：每写出 25 帧及结束时回调一次，stats 含帧数、吞吐 fps 与各阶段累计耗时。
+    # segment_seconds > 0 且视频长于两段时改为分段多进程处理（默认取 VIDEO_SEGMENT_SECONDS，0 为关闭）
     cv2 = _ensure_cv2()
+    if segment_seconds is None:
+        segment_seconds = float(os.getenv("VIDEO_SEGMENT_SECONDS", "0") or 0)
     cap = cv2.VideoCapture(in_path)
     if not cap.isOpened():
         return False
     w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    if segment_seconds > 0 and cap.get(cv2.CAP_PROP_FRAME_COUNT) > 2 * segment_seconds * fps:
+        cap.release()
+        return _remove_watermark_video_segmented(in_path, out_path, mode, sample, strength, segment_seconds, progress)
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     writer = cv2.VideoWriter(out_path, fourcc, fps, (w, h))
-    masks = []
-    count = 0
-    while count < sample:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        masks.append(_detect_wm_mask_bgr(frame, strength=strength))
-        count += 1
-    fixed_mask = None
-    if masks:
-        fixed_mask = masks[0]
-        for m in masks[1:]:
-            fixed_mask = cv2.bitwise_or(fixed_mask, m)
-    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if mode == 'fixed' and fixed_mask is not None:
-            mask = fixed_mask
-        elif mode == 'moving':
-            mask = _detect_wm_mask_bgr(frame, strength=strength)
-        else:
-            cur = _detect_wm_mask_bgr(frame, strength=strength)
-            if fixed_mask is not None and cv2.countNonZero(cv2.bitwise_xor(cur, fixed_mask)) < 0.1 * cv2.countNonZero(fixed_mask):
-                mask = fixed_mask
-            else:
-                mask = cur
-        out = _inpaint_bgr(frame, mask, radius=3+strength)
-        writer.write(out)
-    cap.release()
-    writer.release()
+    try:
+        fixed_mask = _sample_fixed_mask(cap, sample, strength)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        st = _run_video_pipeline(cap, writer, _frame_cleaner(mode, fixed_mask, strength), _video_workers(workers), progress)
+    finally:
+        cap.release()
+        writer.release()
+    try:
+        print(f"[video] {st['frames']} frames {st['fps']:.1f} fps workers={st['workers']} read={st['read_s']:.2f}s process={st['process_s']:.2f}s write={st['write_s']:.2f}s")
+    except Exception:
+        pass
     return True
+
+def import_video_frames(in_path: str, out_dir: str, fps: float = 12, size: int = 128, bg_threshold: int = 30, alpha_threshold: int = 24, edge_shrink: int = 1, limit: int = 600) -> int:
+    # 视频 → 可直接播放的帧目录：按目标帧率抽帧、缩放、去背景后直接写出，单次流式处理
+    cv2 = _ensure_cv2()
+    cap = cv2.VideoCapture(in_path)
+    if not cap.isOpened():
+        return 0
+    os.makedirs(out_dir, exist_ok=True)
+    src_fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    step = 1.0 / max(0.1, float(fps))
+    next_t = 0.0
+    index = 0
+    written = 0
+    width = max(3, len(str(limit)))
+    try:
+        while written < limit:
+            # 只 grab 不解码，落在抽帧时间点上的帧才 retrieve
+            if not cap.grab():
+                break
+            t = index / src_fps
+            index += 1
+            if t + 1e-6 < next_t:
+                continue
+            next_t += step
+            ret, frame = cap.retrieve()
+            if not ret:
+                continue
+            h, w = frame.shape[:2]
+            if size > 0 and w != size:
+                nh = max(1, int(h * size / w))
+                interp = cv2.INTER_AREA if size < w else cv2.INTER_LANCZOS4
+                frame = cv2.resize(frame, (size, nh), interpolation=interp)
+            rgba = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA)
+            img = _to_transparent(Image.fromarray(rgba, 'RGBA').copy(), bg_threshold, alpha_threshold, edge_shrink=edge_shrink)
+            written += 1
+            img.save(os.path.join(out_dir, f"frame_{written:0{width}d}.png"), format='PNG')
+    finally:
+        cap.release()
+    return written